@@ -0,0 +1,415 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+import depthfinal4
+import depthmap
+from depth_codec import decode_depth_data, encode_fixed16, encode_sparse_lists
+from depth_colorizer import DepthColorizer
+from depth_reader import load_depth_map
+from frame_source import ReplaySource
+from device_signer import DeviceSigner
+from jpeg_encoder import JpegEncoder, JpegSettings, encode_jpeg
+from manifest import build_manifest, canonical_json, sign_manifest, sign_message_eip191
+from rectification import to_fixed_point
+from stereo_depth import (compute_stereo_depth_striped, create_disparity_engine, create_stereo_matcher,
+                          disparity_agreement)
+
+# --- CONFIGURATION ---
+RESOLUTIONS = [(640, 480), (1280, 720)]
+REPEATS = 20
+WARMUP = 2
+# Replayed pairs used for the disparity accuracy report
+ACCURACY_FRAMES = 10
+OUTPUT_FILE = 'benchmark_results.json'
+# Throwaway key so signing can be timed without a device key
+BENCH_PRIVATE_KEY = '0x' + '11' * 32
+# Manifests per DeviceSigner.sign_many call
+SIGN_BATCH = 8
+
+
+def make_stereo_pair(width, height, shift=24, seed=0):
+    """Deterministic textured stereo pair with a known disparity band"""
+    rng = np.random.default_rng(seed)
+    texture = rng.integers(0, 256, (height, width + shift, 3), dtype=np.uint8)
+    texture = cv2.GaussianBlur(texture, (5, 5), 0)
+    # imgR[x - shift] == imgL[x]: a background plane at disparity `shift`
+    imgL = texture[:, :width].copy()
+    imgR = texture[:, shift:].copy()
+    # A nearer rectangle in the middle (disparity 2 * shift) so the scene is not a single plane
+    y0, y1, x0, x1 = height // 3, 2 * height // 3, width // 3, 2 * width // 3
+    imgR[y0:y1, x0 - 2 * shift:x1 - 2 * shift] = imgL[y0:y1, x0:x1]
+    return imgL, imgR
+
+
+def make_rectify_maps(width, height):
+    """Float rectification maps shaped like the ones calicali.py saves"""
+    focal = 0.9 * width
+    K = np.array([[focal, 0, width / 2], [0, focal, height / 2], [0, 0, 1]], dtype=np.float64)
+    dist = np.array([-0.05, 0.01, 0, 0, 0], dtype=np.float64)
+    R1 = cv2.Rodrigues(np.array([0.002, -0.004, 0.001]))[0]
+    R2 = cv2.Rodrigues(np.array([-0.002, 0.004, -0.001]))[0]
+    mapL1, mapL2 = cv2.initUndistortRectifyMap(K, dist, R1, K, (width, height), cv2.CV_32FC1)
+    mapR1, mapR2 = cv2.initUndistortRectifyMap(K, dist, R2, K, (width, height), cv2.CV_32FC1)
+    return mapL1, mapL2, mapR1, mapR2
+
+
+def make_moving_patch(imgL, imgR, shift=24, size=80, seed=1, position=None):
+    """Copy of the pair with one new textured patch, as if an object moved into view
+
+    `position` is the patch's (y, x) in the left image, mid-frame by default;
+    (0, 0) puts it on the left border, where matching crops are clamped.
+    """
+    patch = np.random.default_rng(seed).integers(0, 256, (size, size, 3), dtype=np.uint8)
+    imgL, imgR = imgL.copy(), imgR.copy()
+    y, x = position if position is not None else (imgL.shape[0] // 4, imgL.shape[1] // 2)
+    imgL[y:y + size, x:x + size] = patch
+    # Only the part still inside the right image is visible there
+    visible = max(0, shift - x)
+    imgR[y:y + size, x - shift + visible:x - shift + size] = patch[:, visible:]
+    return imgL, imgR
+
+
+def load_inputs(width, height, replay=None):
+    """Fixed inputs for one resolution: raw pair, maps, rectified pair, disparity"""
+    if replay:
+        source = ReplaySource(replay, size=(width, height), loop=False).start()
+        raw_pairs = []
+        while len(raw_pairs) < ACCURACY_FRAMES:
+            pair = source.latest_pair(after_seq=len(raw_pairs))
+            if pair is None:
+                break
+            raw_pairs.append((pair.left, pair.right))
+    else:
+        raw_pairs = [make_stereo_pair(width, height)]
+    rawL, rawR = raw_pairs[0]
+
+    mapL1, mapL2, mapR1, mapR2 = make_rectify_maps(width, height)
+    fixedL = to_fixed_point(mapL1, mapL2)
+    fixedR = to_fixed_point(mapR1, mapR2)
+    rectified = [(cv2.remap(l, mapL1, mapL2, cv2.INTER_LINEAR), cv2.remap(r, mapR1, mapR2, cv2.INTER_LINEAR))
+                 for l, r in raw_pairs]
+    imgL, imgR = rectified[0]
+    stereo = create_stereo_matcher()
+    # Inset ROI standing in for the valid rectification area
+    roi = (width // 20, height // 20, width - width // 10, height - height // 10)
+    disparity = depthmap.compute_stereo_depth(imgL, imgR, stereo)
+    depth_color = depthmap.visualize_depth(disparity)
+    other_views = cv2.vconcat([cv2.hconcat([imgR, depth_color]), cv2.hconcat([depth_color, imgL])])
+
+    return {
+        'rawL': rawL, 'rawR': rawR,
+        'maps': (mapL1, mapL2, mapR1, mapR2),
+        'fixed_maps': fixedL + fixedR,
+        'imgL': imgL, 'imgR': imgR,
+        'rectified': rectified,
+        'stereo': stereo,
+        'roi': roi,
+        'disparity': disparity,
+        'other_views': other_views,
+    }
+
+
+def build_cases(inputs):
+    """Name -> zero-argument callable for every stage being timed"""
+    mapL1, mapL2, mapR1, mapR2 = inputs['maps']
+    fixL1, fixL2, fixR1, fixR2 = inputs['fixed_maps']
+    imgL, imgR = inputs['imgL'], inputs['imgR']
+    disparity = inputs['disparity']
+
+    data_obj = {
+        'timestamp': 0,
+        'baseImage': depthmap.image_to_base64(imgL),
+        'depthImage': depthmap.image_to_base64(inputs['other_views']),
+        'depthData': depthmap.compress_depth_data(disparity),
+    }
+    payload = {'data': data_obj, 'signature': '0x' + '00' * 65}
+    sparse_depth = encode_sparse_lists(disparity)
+    signer = DeviceSigner(BENCH_PRIVATE_KEY)
+    manifest = build_manifest(data_obj)
+    manifests = [manifest] * SIGN_BATCH
+    capture_images = {'baseImage': imgL, 'depthImage': inputs['other_views']}
+    encoder = JpegEncoder()
+    colorizer = DepthColorizer()
+    tuned = JpegSettings(quality=85, optimize=True, progressive=True)
+    optimized_encoder = JpegEncoder({'baseImage': tuned, 'depthImage': tuned})
+    roi_engine = create_disparity_engine('roi', roi=inputs['roi'])
+    temporal_static = create_disparity_engine('temporal')
+    temporal_moving = create_disparity_engine('temporal')
+    temporal_left_edge = create_disparity_engine('temporal')
+    moving_pairs = [(imgL, imgR), make_moving_patch(imgL, imgR)]
+    left_edge_pairs = [(imgL, imgR), make_moving_patch(imgL, imgR, position=(0, 0))]
+    moving_index = [0, 0]
+
+    def temporal_step(engine, pairs, slot):
+        # Alternate between the pair and a version with one changed patch
+        moving_index[slot] ^= 1
+        return engine.compute(*pairs[moving_index[slot]])
+
+    return {
+        'remap_left': lambda: cv2.remap(inputs['rawL'], mapL1, mapL2, cv2.INTER_LINEAR),
+        'remap_right': lambda: cv2.remap(inputs['rawR'], mapR1, mapR2, cv2.INTER_LINEAR),
+        'remap_left_fixed': lambda: cv2.remap(inputs['rawL'], fixL1, fixL2, cv2.INTER_LINEAR),
+        'remap_right_fixed': lambda: cv2.remap(inputs['rawR'], fixR1, fixR2, cv2.INTER_LINEAR),
+        'compute_stereo_depth': lambda: depthmap.compute_stereo_depth(imgL, imgR, inputs['stereo']),
+        'disparity_roi_gray': lambda: roi_engine.compute(imgL, imgR),
+        'disparity_striped': lambda: compute_stereo_depth_striped(imgL, imgR, inputs['stereo']),
+        'disparity_temporal_static': lambda: temporal_static.compute(imgL, imgR),
+        'disparity_temporal_moving': lambda: temporal_step(temporal_moving, moving_pairs, 0),
+        'disparity_temporal_left_edge': lambda: temporal_step(temporal_left_edge, left_edge_pairs, 1),
+        'visualize_depth': lambda: depthmap.visualize_depth(disparity),
+        'depth_colorizer': lambda: colorizer.colorize(disparity),
+        'image_to_base64_left': lambda: depthmap.image_to_base64(imgL),
+        'image_to_base64_views': lambda: depthmap.image_to_base64(inputs['other_views']),
+        'jpeg_encode_sequential': lambda: [encode_jpeg(imgL), encode_jpeg(inputs['other_views'])],
+        'jpeg_encode_parallel': lambda: encoder.encode(capture_images),
+        'jpeg_encode_q85_progressive': lambda: optimized_encoder.encode(capture_images),
+        'compress_depth_data': lambda: depthmap.compress_depth_data(disparity),
+        # Previous scheme: EIP-191 over the whole canonical data JSON
+        'sign_data_eip191': lambda: sign_message_eip191(canonical_json(data_obj), BENCH_PRIVATE_KEY),
+        'build_manifest': lambda: build_manifest(data_obj),
+        # Key derived per call (module function) vs once (DeviceSigner)
+        'sign_manifest': lambda: sign_manifest(manifest, BENCH_PRIVATE_KEY),
+        'device_signer_sign': lambda: signer.sign(manifest),
+        'device_signer_sign_many': lambda: signer.sign_many(manifests),
+        'json_dumps_payload': lambda: json.dumps(payload, separators=(',', ':')),
+        'reconstruct_depth_map': lambda: depthfinal4.reconstruct_depth_map(data_obj['depthData']),
+        'encode_depth_sparse_lists': lambda: json.dumps(encode_sparse_lists(disparity)),
+        'encode_depth_fixed16': lambda: json.dumps(encode_fixed16(disparity)),
+        'decode_depth_sparse_lists': lambda: decode_depth_data(sparse_depth),
+        'decode_depth_fixed16': lambda: decode_depth_data(data_obj['depthData']),
+    }
+
+
+def build_accuracy(inputs):
+    """Agreement of each alternative disparity mode with the single-call full search
+
+    Averaged over the rectified pairs (several when replaying). The ROI mode
+    is compared with full-frame grayscale SGBM, since grayscale matching
+    itself is expected to differ from the BGR reference.
+    """
+    gray_full = create_disparity_engine('roi')
+    engines = {
+        'disparity_roi_gray': create_disparity_engine('roi', roi=inputs['roi']),
+        'disparity_striped': create_disparity_engine('striped', matcher=inputs['stereo']),
+    }
+
+    samples = {name: [] for name in engines}
+    for imgL, imgR in inputs['rectified']:
+        reference = depthmap.compute_stereo_depth(imgL, imgR, inputs['stereo'])
+        gray_reference = gray_full.compute(imgL, imgR)
+        for name, engine in engines.items():
+            ref = gray_reference if name == 'disparity_roi_gray' else reference
+            samples[name].append(disparity_agreement(ref, engine.compute(imgL, imgR)))
+
+    engines['disparity_striped'].close()
+    return {
+        name: {key: float(np.mean([r[key] for r in results])) for key in results[0]}
+        for name, results in samples.items()
+    }
+
+
+def build_sizes(inputs):
+    """Serialized size and round-trip error of each depthData encoding"""
+    disparity = inputs['disparity']
+    sizes = {}
+    for name, encode in [('sparse_lists', encode_sparse_lists), ('fixed16', encode_fixed16)]:
+        encoded = json.dumps(encode(disparity), separators=(',', ':'))
+        decoded = decode_depth_data(json.loads(encoded))
+        valid = disparity > 0
+        sizes[name] = {
+            'bytes': len(encoded),
+            'max_abs_error': float(np.abs(decoded[valid] - disparity[valid]).max()) if valid.any() else 0.0,
+        }
+    return sizes
+
+
+def legacy_reconstruct(depth_data):
+    """reconstruct_depth_map before the typed decoder (default int64/float64 arrays)"""
+    disparity = np.zeros(tuple(depth_data['shape']), dtype=np.float32)
+    if len(depth_data['values']) > 0:
+        disparity[np.array(depth_data['indices_y']), np.array(depth_data['indices_x'])] = np.array(depth_data['values'])
+    return disparity
+
+
+def run_decode_benchmark(path, repeats=REPEATS, warmup=WARMUP):
+    """Time and peak traced memory of decoding the depth map of one capture file"""
+    def json_load(decode):
+        with open(path) as f:
+            return decode(json.load(f)['data']['depthData'])
+
+    cases = {
+        'json_load_legacy_arrays': lambda: json_load(legacy_reconstruct),
+        'json_load_typed_arrays': lambda: json_load(decode_depth_data),
+        'depth_reader': lambda: load_depth_map(path),
+    }
+    print(f"\n--- decode {path} ---")
+    results = {}
+    for name, fn in cases.items():
+        stats = summarize(time_call(fn, repeats, warmup))
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats['peak_mib'] = peak / (1 << 20)
+        results[name] = stats
+        print(f"  {name:<28} p50 {stats['p50_ms']:8.2f} ms   peak {stats['peak_mib']:7.1f} MiB")
+    return results
+
+
+def time_call(fn, repeats=REPEATS, warmup=WARMUP):
+    """Run fn repeatedly and return per-call latencies in milliseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(samples):
+    samples = np.asarray(samples)
+    return {
+        'n': int(samples.size),
+        'mean_ms': float(samples.mean()),
+        'min_ms': float(samples.min()),
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p90_ms': float(np.percentile(samples, 90)),
+        'p99_ms': float(np.percentile(samples, 99)),
+        'max_ms': float(samples.max()),
+    }
+
+
+def environment_info():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = 'unknown'
+    return {
+        'commit': commit,
+        'timestamp': int(time.time()),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'opencv_threads': cv2.getNumThreads(),
+        'numpy': np.__version__,
+    }
+
+
+def run_benchmarks(resolutions=RESOLUTIONS, repeats=REPEATS, warmup=WARMUP, replay=None, only=None):
+    """Time every stage at every resolution and return the results dict"""
+    results = {'environment': environment_info(), 'repeats': repeats, 'results': {}}
+
+    for width, height in resolutions:
+        key = f'{width}x{height}'
+        print(f"\n--- {key} ---")
+        inputs = load_inputs(width, height, replay)
+        results['results'][key] = {}
+
+        for name, fn in build_cases(inputs).items():
+            if only and name not in only:
+                continue
+            stats = summarize(time_call(fn, repeats, warmup))
+            results['results'][key][name] = stats
+            print(f"  {name:<28} p50 {stats['p50_ms']:8.2f} ms   p90 {stats['p90_ms']:8.2f} ms   "
+                  f"p99 {stats['p99_ms']:8.2f} ms")
+
+        striped_speedup = compare_striped(results['results'][key])
+        if striped_speedup is not None:
+            results['striped_speedup'] = results.get('striped_speedup', {})
+            results['striped_speedup'][key] = striped_speedup
+
+        accuracy = build_accuracy(inputs)
+        results['accuracy'] = results.get('accuracy', {})
+        results['accuracy'][key] = accuracy
+        for name, acc in accuracy.items():
+            print(f"  {name:<28} agreement {acc['agreement']*100:5.1f}%   "
+                  f"MAE {acc['mean_abs_error']:.2f} px   coverage {acc['coverage']*100:5.1f}%")
+
+        sizes = build_sizes(inputs)
+        results['depth_encoding'] = results.get('depth_encoding', {})
+        results['depth_encoding'][key] = sizes
+        for name, size in sizes.items():
+            print(f"  depthData {name:<18} {size['bytes'] / 1024:8.1f} KiB   max error {size['max_abs_error']:.4f} px")
+
+    return results
+
+
+def compare_striped(stages):
+    """Speedup of the striped engine over one full-frame call on this machine's cores, or None if not timed"""
+    if 'compute_stereo_depth' not in stages or 'disparity_striped' not in stages:
+        return None
+    speedup = stages['compute_stereo_depth']['p50_ms'] / stages['disparity_striped']['p50_ms']
+    verdict = "--disparity-mode striped pays off" if speedup > 1 else "keep --disparity-mode full"
+    print(f"  striped vs full on {os.cpu_count()} core(s): {speedup:.2f}x, {verdict}")
+    return speedup
+
+
+def compare_results(current, baseline):
+    """Print p50 changes against a previous results file"""
+    print("\n" + "="*70)
+    print(f"COMPARISON vs {baseline['environment'].get('commit', '?')} (p50)")
+    print("="*70)
+    for res, stages in current['results'].items():
+        base_stages = baseline.get('results', {}).get(res, {})
+        for name, stats in stages.items():
+            if name not in base_stages:
+                continue
+            before = base_stages[name]['p50_ms']
+            after = stats['p50_ms']
+            change = (after - before) / before * 100 if before else 0.0
+            print(f"  {res:<10} {name:<28} {before:8.2f} -> {after:8.2f} ms  ({change:+.1f}%)")
+    print("="*70)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage latency benchmark for the depth and capture paths")
+    parser.add_argument('--repeats', type=int, default=REPEATS)
+    parser.add_argument('--warmup', type=int, default=WARMUP)
+    parser.add_argument('--resolution', action='append', metavar='WxH',
+                        help="Resolution to benchmark (repeatable, default: 640x480 and 1280x720)")
+    parser.add_argument('--replay', metavar='PATH', help="Use the first recorded stereo pair instead of synthetic frames")
+    parser.add_argument('--only', action='append', metavar='STAGE', help="Only run the named stage (repeatable)")
+    parser.add_argument('--output', default=OUTPUT_FILE, help="Where to write the JSON results")
+    parser.add_argument('--compare', metavar='JSON', help="Previous results file to compare against")
+    parser.add_argument('--decode', metavar='CAPTURE_JSON',
+                        help="Only benchmark decoding the depth map of a capture file (time and peak memory)")
+    args = parser.parse_args()
+
+    if args.decode:
+        results = {'environment': environment_info(), 'repeats': args.repeats,
+                   'decode': run_decode_benchmark(args.decode, args.repeats, args.warmup)}
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+        return
+
+    resolutions = RESOLUTIONS
+    if args.resolution:
+        resolutions = [tuple(int(v) for v in r.lower().split('x')) for r in args.resolution]
+
+    results = run_benchmarks(resolutions, args.repeats, args.warmup, args.replay, args.only)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✓ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare_results(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
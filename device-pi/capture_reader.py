@@ -0,0 +1,161 @@
+import base64
+import json
+import mmap
+
+import cv2
+import numpy as np
+
+from depth_codec import decode_depth_data
+from depth_reader import parse_depth_section
+from json_scan import skip_whitespace, string_end, value_end
+from manifest import BASE64_CHUNK, MANIFEST_COMPONENTS, component_digest, stream_digest
+
+# Fields of the data object that hold base64 JPEGs
+IMAGE_FIELDS = ('baseImage', 'depthImage')
+
+
+def _members(buf, start):
+    """{key: (value start, value end)} of the JSON object opening at buf[start]"""
+    if buf[start:start + 1] != b'{':
+        raise ValueError("Malformed capture: expected an object")
+    members = {}
+    pos = skip_whitespace(buf, start + 1)
+    if buf[pos:pos + 1] == b'}':
+        return members
+    while True:
+        if buf[pos:pos + 1] != b'"':
+            raise ValueError("Malformed capture: expected a key")
+        key_end = string_end(buf, pos)
+        key = json.loads(buf[pos:key_end + 1])
+        pos = skip_whitespace(buf, key_end + 1)
+        if buf[pos:pos + 1] != b':':
+            raise ValueError(f"Malformed capture: no value for {key}")
+        value_start = skip_whitespace(buf, pos + 1)
+        end = value_end(buf, value_start)
+        members[key] = (value_start, end)
+        pos = skip_whitespace(buf, end)
+        if buf[pos:pos + 1] == b'}':
+            return members
+        if buf[pos:pos + 1] != b',':
+            raise ValueError(f"Malformed capture after {key}")
+        pos = skip_whitespace(buf, pos + 1)
+
+
+class CaptureReader:
+    """Lazy reader for signed capture files (depth_capture_*.json)
+
+    The file is memory-mapped and only indexed on open: the position of
+    every field is found by skipping over strings and number lists, and
+    just `timestamp`, `signature` and `manifest` are parsed. baseImage,
+    depthImage and depthData are decoded on request, one at a time, so
+    memory follows the largest field asked for instead of the whole file
+    as with json.load. Use as a context manager or call close().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Empty capture file: {path}")
+
+        try:
+            top = _members(self._buf, skip_whitespace(self._buf, 0))
+            if 'data' not in top:
+                raise ValueError("No data object in capture")
+            self._data_span = top['data']
+            self.fields = _members(self._buf, self._data_span[0])
+            self.signature = self._parse(top['signature']) if 'signature' in top else ''
+            self.manifest = self._parse(top['manifest']) if 'manifest' in top else None
+            if self.manifest is not None and not isinstance(self.manifest, dict):
+                raise ValueError(f"Malformed capture: manifest is a JSON {type(self.manifest).__name__}, not an object")
+            self.timestamp = self._parse(self.fields['timestamp']) if 'timestamp' in self.fields else None
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._buf is not None:
+            self._buf.close()
+            self._buf = None
+        self._file.close()
+
+    def _parse(self, span):
+        return json.loads(self._buf[span[0]:span[1]])
+
+    def _span(self, name):
+        if name not in self.fields:
+            raise KeyError(f"Capture has no {name}")
+        return self.fields[name]
+
+    def _string_span(self, name):
+        """(start, end) of a string field's contents, or None if it uses escapes"""
+        start, end = self._span(name)
+        if self._buf[start:start + 1] != b'"':
+            raise ValueError(f"{name} is not a string")
+        if self._buf.find(b'\\', start + 1, end - 1) >= 0:
+            return None
+        return start + 1, end - 1
+
+    def text(self, name):
+        """A string field (e.g. base64 image) as str"""
+        span = self._string_span(name)
+        if span is None:
+            return self._parse(self._span(name))
+        return self._buf[span[0]:span[1]].decode('ascii')
+
+    def jpeg(self, name):
+        """Raw JPEG bytes of an image field"""
+        span = self._string_span(name)
+        if span is None:
+            return base64.b64decode(self.text(name))
+        return base64.b64decode(self._buf[span[0]:span[1]])
+
+    def image(self, name):
+        """Decoded BGR image of an image field (None if it is not a valid JPEG)"""
+        return cv2.imdecode(np.frombuffer(self.jpeg(name), dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    def depth_data(self):
+        """depthData dict, with version 1 lists parsed into typed arrays"""
+        start, end = self._span('depthData')
+        return parse_depth_section(self._buf[start:end].decode('utf-8'))
+
+    def depth_map(self):
+        """float32 disparity map"""
+        return decode_depth_data(self.depth_data())
+
+    def component_digest(self, name):
+        """manifest.component_digest of one data field, images hashed straight from the file"""
+        if name in IMAGE_FIELDS:
+            span = self._string_span(name)
+            if span is not None:
+                start, end = span
+                chunks = (self._buf[offset:min(offset + BASE64_CHUNK, end)]
+                          for offset in range(start, end, BASE64_CHUNK))
+                return '0x' + stream_digest(chunks).hex()
+        return component_digest(self._parse(self._span(name)))
+
+    def verify_components(self, manifest=None, components=MANIFEST_COMPONENTS):
+        """Names of the components whose digest does not match the manifest"""
+        manifest = manifest or self.manifest or {}
+        if not isinstance(manifest, dict):
+            raise ValueError(f"manifest is a {type(manifest).__name__}, not an object")
+        digests = manifest.get('digests', {})
+        if not isinstance(digests, dict):
+            raise ValueError(f"manifest digests is a JSON {type(digests).__name__}, not an object")
+        return [
+            name for name in components
+            if name not in self.fields or digests.get(name) != self.component_digest(name)
+        ]
+
+    def data(self):
+        """The whole data object, as json.load would return it"""
+        return self._parse(self._data_span)
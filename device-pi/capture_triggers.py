@@ -0,0 +1,142 @@
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+
+# --- CONFIGURATION ---
+CONTROL_SOCKET = 'capture.sock'
+# How often the trigger directory is checked for dropped files (seconds)
+TRIGGER_POLL_INTERVAL = 0.1
+# Commands understood on every interface
+COMMANDS = ('capture', 'status', 'quit')
+# SIGUSR1 takes a capture; SIGINT/SIGTERM stop the daemon
+SIGNAL_COMMANDS = {signal.SIGUSR1: 'capture', signal.SIGINT: 'quit', signal.SIGTERM: 'quit'}
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            command = line.decode('utf-8', 'replace').strip()
+            if command:
+                reply = self.server.triggers.dispatch(command, 'socket')
+                self.wfile.write((reply + '\n').encode('utf-8'))
+
+
+class _ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class CaptureTriggers:
+    """External capture triggers for a headless run
+
+    Every interface feeds text commands (`capture`, `status`, `quit`) to
+    `handle(command, source)`, which returns a one-line reply:
+
+    - a Unix stream socket (one command per line, one reply line each),
+      e.g. `echo capture | nc -U capture.sock`
+    - stdin, replies on stdout
+    - a drop directory: every file that appears is one command (its
+      contents, or `capture` when empty) and is deleted once handled;
+      dot files are skipped, so a command can be written then renamed in
+    - signals: SIGUSR1 captures, SIGINT/SIGTERM quit
+
+    Socket, stdin and directory commands are handled on their own threads
+    as they arrive, so `handle` must be thread-safe. Signals only set a
+    flag (a handler must not take locks the interrupted code may hold);
+    the main loop runs them with `poll_signals()`.
+    """
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.running = True
+        self.threads = []
+        self.server = None
+        self.socket_path = None
+        self._signals = []
+        self._signal_commands = {}
+        self._previous_handlers = {}
+
+    def dispatch(self, command, source):
+        command = command.strip().lower()
+        if command not in COMMANDS:
+            return f"error unknown command {command!r} (expected {', '.join(COMMANDS)})"
+        try:
+            return self.handle(command, source)
+        except Exception as e:
+            print(f"❌ Trigger '{command}' from {source} failed: {e}")
+            return f"error {e}"
+
+    def _start_thread(self, target, name, *args):
+        thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+
+    def serve_socket(self, path=CONTROL_SOCKET):
+        """Accept commands on a Unix stream socket at `path` (a stale file is replaced)"""
+        if os.path.exists(path):
+            os.unlink(path)
+        self.server = _ControlServer(path, _ControlHandler)
+        self.server.triggers = self
+        self.socket_path = path
+        self._start_thread(self.server.serve_forever, 'control-socket')
+        print(f"✓ Control socket: {path}")
+
+    def serve_stdin(self):
+        """Read one command per line from stdin"""
+        def read_stdin():
+            for line in sys.stdin:
+                if not self.running:
+                    break
+                if line.strip():
+                    print(self.dispatch(line, 'stdin'), flush=True)
+        self._start_thread(read_stdin, 'control-stdin')
+        print("✓ Reading commands from stdin")
+
+    def watch_directory(self, path, interval=TRIGGER_POLL_INTERVAL):
+        """Treat every file dropped into `path` as a command"""
+        os.makedirs(path, exist_ok=True)
+
+        def watch():
+            while self.running:
+                for name in sorted(os.listdir(path)):
+                    if name.startswith('.'):
+                        continue
+                    file_path = os.path.join(path, name)
+                    try:
+                        with open(file_path) as f:
+                            command = f.read().strip() or 'capture'
+                        os.unlink(file_path)
+                    except OSError:
+                        continue
+                    print(f"{self.dispatch(command, 'file')} ({name})")
+                time.sleep(interval)
+        self._start_thread(watch, 'trigger-dir')
+        print(f"✓ Watching trigger directory: {path}")
+
+    def install_signals(self, commands=SIGNAL_COMMANDS):
+        """Route signals to commands (main thread only); run them with poll_signals()"""
+        for signum in commands:
+            self._previous_handlers[signum] = signal.signal(signum, self._on_signal)
+        self._signal_commands = dict(commands)
+
+    def _on_signal(self, signum, _frame):
+        self._signals.append(signum)
+
+    def poll_signals(self):
+        """Run the commands of signals received since the last call"""
+        while self._signals:
+            signum = self._signals.pop(0)
+            reply = self.dispatch(self._signal_commands[signum], signal.Signals(signum).name)
+            print(f"{signal.Signals(signum).name}: {reply}")
+
+    def close(self):
+        self.running = False
+        for signum, handler in self._previous_handlers.items():
+            signal.signal(signum, handler)
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
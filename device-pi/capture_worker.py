@@ -0,0 +1,150 @@
+import queue
+import threading
+import time
+import traceback
+
+import cv2
+
+# Status colours (BGR) used by capture handlers
+STATUS_INFO = (0, 255, 0)
+STATUS_ERROR = (0, 0, 255)
+
+
+def draw_status_message(frame, message, color=STATUS_INFO, max_chars_per_line=50):
+    """Draw a centred multi-line message on a dimmed box, in place"""
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    font_scale = 0.7
+    thickness = 2
+    text_height = 35
+
+    # Break long lines (like CID) into multiple lines if needed
+    lines = []
+    for line in message.split('\n'):
+        if len(line) > max_chars_per_line:
+            for i in range(0, len(line), max_chars_per_line):
+                lines.append(line[i:i+max_chars_per_line])
+        else:
+            lines.append(line)
+
+    widths = [cv2.getTextSize(line, font, font_scale, thickness)[0][0] for line in lines]
+    box_w = max(widths) + 40
+    box_h = len(lines) * text_height + 30
+    x0 = max(0, (frame.shape[1] - box_w) // 2)
+    y0 = max(0, (frame.shape[0] - box_h) // 2)
+    x1 = min(frame.shape[1], x0 + box_w)
+    y1 = min(frame.shape[0], y0 + box_h)
+
+    # Semi-transparent backdrop only behind the text, not the whole view
+    frame[y0:y1, x0:x1] = cv2.convertScaleAbs(frame[y0:y1, x0:x1], alpha=0.3)
+
+    for i, (line, width) in enumerate(zip(lines, widths)):
+        text_x = (frame.shape[1] - width) // 2
+        text_y = y0 + 15 + (i + 1) * text_height - 8
+        # Draw text with shadow for better visibility
+        cv2.putText(frame, line, (text_x + 2, text_y + 2), font, font_scale, (0, 0, 0), thickness + 1)
+        cv2.putText(frame, line, (text_x, text_y), font, font_scale, color, thickness)
+
+
+class StatusOverlay:
+    """Timed status messages drawn onto the live view without blocking it"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._message = None
+
+    def post(self, message, duration=3, color=STATUS_INFO):
+        with self._lock:
+            self._message = (message, color, time.monotonic() + duration)
+
+    def draw(self, frame):
+        with self._lock:
+            current = self._message
+            if current is not None and time.monotonic() > current[2]:
+                self._message = current = None
+        if current is not None:
+            draw_status_message(frame, current[0], current[1])
+
+
+class ConsoleStatus:
+    """StatusOverlay stand-in for headless runs: status messages go to the log"""
+
+    def post(self, message, duration=3, color=STATUS_INFO):
+        print(' - '.join(line for line in message.split('\n') if line))
+
+    def draw(self, frame):
+        pass
+
+
+class CaptureWorker:
+    """Background queue that processes captures off the render thread
+
+    `handler(job)` does the slow work (encoding, signing, upload) and returns
+    (message, color[, duration]) or None; the message is posted to the
+    StatusOverlay. The render loop only snapshots the frame data and
+    calls `submit()`, so it never stalls and several captures can be queued.
+    """
+
+    def __init__(self, handler, status=None, workers=1, maxsize=8, result_duration=5):
+        self.handler = handler
+        self.status = status
+        self.result_duration = result_duration
+        self.jobs = queue.Queue(maxsize=maxsize)
+        self.running = True
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.threads = [
+            threading.Thread(target=self._run, name=f'capture-{n}', daemon=True)
+            for n in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    @property
+    def pending(self):
+        """Captures queued or in progress"""
+        with self._lock:
+            return self._pending
+
+    def submit(self, job):
+        """Queue a capture; returns False if the backlog is full"""
+        with self._lock:
+            try:
+                self.jobs.put_nowait(job)
+            except queue.Full:
+                return False
+            self._pending += 1
+        return True
+
+    def _run(self):
+        while self.running or not self.jobs.empty():
+            try:
+                job = self.jobs.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            try:
+                result = self.handler(job)
+            except Exception as e:
+                print(f"❌ Capture processing failed: {e}")
+                traceback.print_exc()
+                result = ("❌ Capture Failed\n\nCheck console for details", STATUS_ERROR)
+            finally:
+                with self._lock:
+                    self._pending -= 1
+            if result is not None and self.status is not None:
+                message, color = result[:2]
+                duration = result[2] if len(result) > 2 else self.result_duration
+                self.status.post(message, duration, color)
+
+    def stop(self, drain=True, timeout=None):
+        """Stop the workers, by default after finishing every queued capture"""
+        if not drain:
+            while True:
+                try:
+                    self.jobs.get_nowait()
+                except queue.Empty:
+                    break
+                with self._lock:
+                    self._pending -= 1
+        self.running = False
+        for thread in self.threads:
+            thread.join(timeout)
@@ -0,0 +1,105 @@
+import base64
+import zlib
+
+import numpy as np
+
+# --- CONFIGURATION ---
+# Version 1 is the original sparse JSON lists (indices_y / indices_x / values)
+SPARSE_LISTS_VERSION = 1
+SPARSE_INDEX_DTYPE = np.int32
+# Version 2 is fixed-point uint16 values plus a packed validity bitmap
+FIXED16_VERSION = 2
+FIXED16_ENCODING = 'fixed16-zlib'
+# SGBM disparities are multiples of 1/16 px, so this scale is lossless for them
+FIXED16_SCALE = 16
+ZLIB_LEVEL = 6
+
+
+def depth_stats(disparity, valid_mask):
+    """Summary fields shown by the web app, shared by every encoding"""
+    return {
+        'shape': list(disparity.shape),
+        'dtype': str(disparity.dtype),
+        'min': float(np.min(disparity)),
+        'max': float(np.max(disparity)),
+        'mean': float(np.mean(disparity)),
+        'valid_pixels': int(np.count_nonzero(valid_mask)),
+    }
+
+
+def _b64_zlib(raw):
+    return base64.b64encode(zlib.compress(raw, ZLIB_LEVEL)).decode('ascii')
+
+
+def _unb64_zlib(text):
+    return zlib.decompress(base64.b64decode(text))
+
+
+def encode_sparse_lists(disparity):
+    """Version 1 encoding: every valid pixel as JSON index/value lists"""
+    valid_mask = disparity > 0
+    depth_data = depth_stats(disparity, valid_mask)
+    indices = np.nonzero(valid_mask)
+    depth_data['indices_y'] = indices[0].tolist()
+    depth_data['indices_x'] = indices[1].tolist()
+    depth_data['values'] = disparity[valid_mask].tolist()
+    return depth_data
+
+
+def encode_fixed16(disparity, scale=FIXED16_SCALE):
+    """Version 2 encoding: packed validity bitmap + uint16 fixed-point values
+
+    Pixels with disparity > 0 are valid, as in version 1. Their values are
+    stored in raster order as round(disparity * scale) and delta-coded along
+    the raster so zlib sees long runs of small numbers; the bitmap is
+    np.packbits of the mask. Both are zlib-compressed and base64-embedded.
+    """
+    valid_mask = disparity > 0
+    depth_data = depth_stats(disparity, valid_mask)
+
+    fixed = np.rint(disparity[valid_mask] * scale)
+    fixed = np.clip(fixed, 0, np.iinfo(np.uint16).max).astype(np.uint16)
+    # Wrapping uint16 differences decode exactly with a wrapping cumsum
+    deltas = np.diff(fixed, prepend=np.uint16(0)).astype('<u2')
+
+    depth_data.update({
+        'encoding': FIXED16_ENCODING,
+        'version': FIXED16_VERSION,
+        'scale': scale,
+        'mask': _b64_zlib(np.packbits(valid_mask.ravel()).tobytes()),
+        'values': _b64_zlib(deltas.tobytes()),
+    })
+    return depth_data
+
+
+def encoding_version(depth_data):
+    """Format version of an encoded depthData dict (1 when unversioned)"""
+    return int(depth_data.get('version', SPARSE_LISTS_VERSION))
+
+
+def decode_depth_data(depth_data):
+    """Reconstruct the float32 disparity map from either encoding"""
+    shape = tuple(depth_data['shape'])
+    disparity = np.zeros(shape, dtype=np.float32)
+    version = encoding_version(depth_data)
+
+    if version == SPARSE_LISTS_VERSION:
+        # int32 indices / float32 values: no int64 or float64 copies of the lists
+        if len(depth_data['values']) > 0:
+            indices_y = np.asarray(depth_data['indices_y'], dtype=SPARSE_INDEX_DTYPE)
+            indices_x = np.asarray(depth_data['indices_x'], dtype=SPARSE_INDEX_DTYPE)
+            disparity[indices_y, indices_x] = np.asarray(depth_data['values'], dtype=np.float32)
+        return disparity
+
+    if version == FIXED16_VERSION:
+        size = disparity.size
+        bits = np.frombuffer(_unb64_zlib(depth_data['mask']), dtype=np.uint8)
+        valid_mask = np.unpackbits(bits, count=size).view(bool).reshape(shape)
+        deltas = np.frombuffer(_unb64_zlib(depth_data['values']), dtype='<u2')
+        fixed = np.cumsum(deltas, dtype=np.uint16)
+        if fixed.size != np.count_nonzero(valid_mask):
+            raise ValueError(f"Depth data has {fixed.size} values for {np.count_nonzero(valid_mask)} valid pixels")
+        disparity[valid_mask] = fixed / np.float32(depth_data['scale'])
+        return disparity
+
+    raise ValueError(f"Unsupported depth data version: {version}")
@@ -0,0 +1,91 @@
+import cv2
+import numpy as np
+
+from stereo_depth import MIN_DISP, NUM_DISP
+
+# --- CONFIGURATION ---
+# Weight of the newest frame in the smoothed display range (1.0 = per-frame min/max)
+RANGE_SMOOTHING = 0.2
+# SGBM disparities are multiples of 1/16 px
+FIXED_SCALE = 16
+MEDIAN_KSIZE = 5
+# Output images handed out in rotation; must exceed the frames that can hold
+# one at a time (queued behind the visualize stage plus the one on screen)
+OUTPUT_BUFFERS = 4
+
+
+class DepthColorizer:
+    """Disparity -> BGR depth view through lookup tables, into preallocated buffers
+
+    Replaces visualize_depth in the live loop. Disparity is converted to
+    fixed point (1/16 px) and mapped to a grey level by a 64K-entry table
+    that is rebuilt from the display range each frame; grey level 0 is
+    kept for invalid pixels. After the same 5x5 median blur, a 256-entry
+    user colormap (level 0 black) gives the BGR output, so no per-frame
+    boolean masks, float normalisation or masked fills are needed.
+
+    The display range follows the valid min/max with an exponential moving
+    average (`smoothing`), so colors do not jump with every frame's
+    outliers. Not thread-safe: give each pipeline worker its own instance.
+    """
+
+    def __init__(self, min_disp=MIN_DISP, num_disp=NUM_DISP, smoothing=RANGE_SMOOTHING,
+                 colormap=cv2.COLORMAP_JET, buffers=OUTPUT_BUFFERS):
+        self.smoothing = smoothing
+        self.buffers = buffers
+        # Valid disparities, exclusive of the bounds like visualize_depth
+        self.valid_low = min_disp + 1 / FIXED_SCALE
+        self.valid_high = num_disp - 1 / FIXED_SCALE
+        self.code_low = min_disp * FIXED_SCALE + 1
+        self.code_high = num_disp * FIXED_SCALE - 1
+        self.codes = np.arange(self.code_low, self.code_high + 1, dtype=np.float32)
+        self.levels = np.zeros(1 << 16, dtype=np.uint8)
+        self.colors = cv2.applyColorMap(np.arange(256, dtype=np.uint8).reshape(-1, 1), colormap)
+        self.colors[0] = 0
+        # Smoothed (low, high) display range in fixed-point codes
+        self.range = None
+        self.shape = None
+
+    def _allocate(self, shape):
+        self.shape = shape
+        # intp, so np.take does not make an index copy
+        self.fixed = np.empty(shape, dtype=np.intp)
+        self.mask = np.empty(shape, dtype=np.uint8)
+        self.gray = np.empty(shape, dtype=np.uint8)
+        self.blurred = np.empty(shape, dtype=np.uint8)
+        self.outputs = [np.zeros(shape + (3,), dtype=np.uint8) for _ in range(self.buffers)]
+        self.next_output = 0
+
+    def _update_range(self, low, high):
+        if self.range is None:
+            self.range = (low, high)
+        else:
+            alpha = self.smoothing
+            old_low, old_high = self.range
+            self.range = (old_low + alpha * (low - old_low), old_high + alpha * (high - old_high))
+        low, high = self.range
+        scale = 254.0 / max(high - low, 1.0)
+        self.levels[self.code_low:self.code_high + 1] = 1 + np.clip((self.codes - low) * scale, 0, 254)
+
+    def colorize(self, disparity):
+        """BGR depth view of a float disparity map; the returned buffer is reused after `buffers` calls"""
+        if self.shape != disparity.shape[:2]:
+            self._allocate(disparity.shape[:2])
+        out = self.outputs[self.next_output]
+        self.next_output = (self.next_output + 1) % self.buffers
+
+        cv2.inRange(disparity, self.valid_low, self.valid_high, dst=self.mask)
+        low, high, _, _ = cv2.minMaxLoc(disparity, self.mask)
+        if high < self.valid_low:
+            out.fill(0)
+            return out
+        self._update_range(low * FIXED_SCALE, high * FIXED_SCALE)
+
+        np.multiply(disparity, FIXED_SCALE, out=self.fixed, casting='unsafe')
+        # Out-of-range codes (including SGBM's negative invalid value) clip onto level 0
+        np.take(self.levels, self.fixed, out=self.gray, mode='clip')
+        cv2.medianBlur(self.gray, MEDIAN_KSIZE, dst=self.blurred)
+        # Invalid pixels back to level 0 after the blur
+        cv2.min(self.blurred, self.mask, dst=self.blurred)
+        cv2.applyColorMap(self.blurred, self.colors, out)
+        return out
@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+
+from depth_codec import SPARSE_INDEX_DTYPE, decode_depth_data
+from json_scan import skip_whitespace, value_end
+
+# Version 1 list fields parsed straight into typed arrays
+SPARSE_ARRAYS = {'indices_y': SPARSE_INDEX_DTYPE, 'indices_x': SPARSE_INDEX_DTYPE, 'values': np.float32}
+DEPTH_KEY = '"depthData"'
+
+
+def depth_span(text):
+    """(start, end) of the depthData object inside a capture document's JSON text"""
+    key = text.find(DEPTH_KEY)
+    if key < 0:
+        raise ValueError("No depthData in capture")
+    pos = skip_whitespace(text, key + len(DEPTH_KEY))
+    if text[pos] != ':':
+        raise ValueError("Malformed depthData entry")
+    start = skip_whitespace(text, pos + 1)
+    if text[start] != '{':
+        raise ValueError("depthData is not an object")
+    return start, value_end(text, start)
+
+
+def _list_span(text, name, start, end):
+    """(start, end) of the number list stored under `name`, or None"""
+    key = text.find(f'"{name}"', start, end)
+    if key < 0:
+        return None
+    list_start = skip_whitespace(text, text.index(':', key) + 1)
+    if text[list_start] != '[':
+        # Not a list (the version 2 'values' is a base64 string)
+        return None
+    return list_start, text.index(']', list_start) + 1
+
+
+def parse_depth_section(text, start=0, end=None):
+    """depthData dict from JSON text, with version 1 lists as int32/float32 arrays
+
+    Each index/value list is parsed by np.fromstring straight into an
+    array of its final dtype, so the lists never exist as Python ints and
+    floats (or int64/float64 arrays). What is left of the object is small
+    and goes through json.loads.
+    """
+    end = len(text) if end is None else end
+    arrays, spans = {}, []
+    for name, dtype in SPARSE_ARRAYS.items():
+        span = _list_span(text, name, start, end)
+        if span is None:
+            continue
+        body = text[span[0] + 1:span[1] - 1]
+        arrays[name] = np.fromstring(body, dtype=dtype, sep=',') if body.strip() else np.empty(0, dtype=dtype)
+        spans.append(span)
+
+    # Rebuild the object without the lists
+    pieces, pos = [], start
+    for list_start, list_end in sorted(spans):
+        pieces += [text[pos:list_start], 'null']
+        pos = list_end
+    pieces.append(text[pos:end])
+    depth_data = json.loads(''.join(pieces))
+    depth_data.update(arrays)
+    return depth_data
+
+
+def read_depth_data(path):
+    """depthData of a capture file (signed depth_capture_*.json) without loading its lists as Python objects"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    return parse_depth_section(text, *depth_span(text))
+
+
+def load_depth_map(path):
+    """float32 disparity map of a capture file, any depthData version"""
+    return decode_depth_data(read_depth_data(path))
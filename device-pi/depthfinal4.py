@@ -1,14 +1,26 @@
+import argparse
 import numpy as np
 import cv2
 import os
 from collections import deque
 import time
+import threading
 import json
 import base64
-from eth_account import Account
-from eth_account.messages import encode_defunct
 from dotenv import load_dotenv
 
+from capture_worker import STATUS_ERROR, STATUS_INFO, CaptureWorker, StatusOverlay
+from depth_codec import decode_depth_data, encode_fixed16
+from depth_colorizer import DepthColorizer
+from device_signer import UNSIGNED, DeviceSigner
+from frame_source import add_source_arguments, open_frame_source
+from jpeg_encoder import JpegEncoder, JpegSettings, encode_jpeg
+from manifest import build_manifest
+from pipeline import Pipeline, Stage
+from rectification import load_rectification_maps, load_valid_roi
+from stereo_depth import DISPARITY_MODES, create_disparity_engine, disparity_workers
+from view_canvas import FiveViewCanvas
+
 # Load environment variables
 load_dotenv()
 
@@ -20,6 +32,23 @@ WIDTH = 640
 HEIGHT = 480
 FPS = 30
 
+# Worker threads per pipeline stage (capture runs on the StereoGrabber threads)
+PIPELINE_WORKERS = {'rectify': 1, 'disparity': 2, 'visualize': 1}
+PIPELINE_QUEUE_SIZE = 2
+PIPELINE_DROP = 'drop_oldest'  # 'block', 'drop_oldest' or 'drop_newest'
+
+# Disparity engine: 'full' (BGR SGBM on the whole frame), 'roi' (grayscale, valid ROI only),
+# 'striped' (parallel bands, one per core; opt-in where benchmark.py shows it beating 'full',
+# and drop PIPELINE_WORKERS['disparity'] to 1 with it)
+# or 'temporal' (re-match only changed tiles; always runs on one disparity worker)
+DISPARITY_MODE = 'full'
+
+# JPEG settings per output (quality 0-100, Huffman optimize, progressive)
+JPEG_SETTINGS = {
+    'baseImage': JpegSettings(quality=95, optimize=False, progressive=False),
+    'depthImage': JpegSettings(quality=95, optimize=False, progressive=False),
+}
+
 def compute_stereo_depth(imgL, imgR, stereo):
     """Compute depth map using SGBM"""
     disparity = stereo.compute(imgL, imgR).astype(np.float32) / 16.0
@@ -27,8 +56,9 @@ def compute_stereo_depth(imgL, imgR, stereo):
 
 def visualize_depth(disparity, min_disp=0, num_disp=96):
     """Create depth visualization"""
+    height, width = disparity.shape[:2]
     mask = (disparity > min_disp) & (disparity < num_disp)
-    disp_vis = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    disp_vis = np.zeros((height, width, 3), dtype=np.uint8)
     
     if mask.any():
         valid_disp = disparity[mask]
@@ -37,7 +67,7 @@ def visualize_depth(disparity, min_disp=0, num_disp=96):
         
         normalized = (valid_disp - min_val) / (max_val - min_val + 1e-5) * 255
         
-        disp_vis_gray = np.zeros((HEIGHT, WIDTH), dtype=np.uint8)
+        disp_vis_gray = np.zeros((height, width), dtype=np.uint8)
         disp_vis_gray[mask] = normalized.astype(np.uint8)
         
         disp_vis_gray = cv2.medianBlur(disp_vis_gray, 5)
@@ -64,89 +94,32 @@ def compute_enhanced_depth(frame):
 
 def image_to_base64(image):
     """Convert OpenCV image to base64 string"""
-    _, buffer = cv2.imencode('.jpg', image)
-    return base64.b64encode(buffer).decode('utf-8')
+    return base64.b64encode(encode_jpeg(image)).decode('utf-8')
 
 def compress_depth_data(disparity):
-    """Compress depth data for JSON storage"""
-    valid_mask = disparity > 0
-    
-    depth_data = {
-        'shape': list(disparity.shape),
-        'dtype': str(disparity.dtype),
-        'min': float(np.min(disparity)),
-        'max': float(np.max(disparity)),
-        'mean': float(np.mean(disparity)),
-        'valid_pixels': int(np.sum(valid_mask))
-    }
-    
-    # Store only non-zero values with their indices for efficiency
-    if valid_mask.any():
-        indices = np.where(valid_mask)
-        values = disparity[valid_mask]
-        
-        # Convert to lists for JSON serialization
-        depth_data['indices_y'] = indices[0].tolist()
-        depth_data['indices_x'] = indices[1].tolist()
-        depth_data['values'] = values.tolist()
-    else:
-        depth_data['indices_y'] = []
-        depth_data['indices_x'] = []
-        depth_data['values'] = []
-    
-    return depth_data
+    """Compress depth data for JSON storage (fixed-point + validity bitmap, see depth_codec)"""
+    return encode_fixed16(disparity)
 
 def reconstruct_depth_map(depth_data):
-    """Reconstruct depth map from compressed data"""
-    shape = tuple(depth_data['shape'])
-    disparity = np.zeros(shape, dtype=np.float32)
-    
-    if len(depth_data['values']) > 0:
-        indices_y = np.array(depth_data['indices_y'])
-        indices_x = np.array(depth_data['indices_x'])
-        values = np.array(depth_data['values'])
-        
-        disparity[indices_y, indices_x] = values
-    
-    return disparity
+    """Reconstruct depth map from compressed data (old index/value lists or fixed-point)"""
+    return decode_depth_data(depth_data)
 
-def sign_data_eip191(data_dict, private_key):
-    """Sign data using EIP-191 signature"""
-    # Convert data to deterministic JSON string
-    data_str = json.dumps(data_dict, sort_keys=True, separators=(',', ':'))
-    
-    # Create Ethereum account from private key
-    account = Account.from_key(private_key)
-    
-    # Encode message with EIP-191
-    message = encode_defunct(text=data_str)
-    
-    # Sign
-    signed_message = account.sign_message(message)
-    
-    return signed_message.signature.hex()
-
-def save_depth_capture(imgL, other_views, disparity, timestamp):
-    """Save depth capture as signed JSON"""
-    
-    private_key = os.getenv('PRIVATE_KEY')
-    
-    if not private_key:
-        print("⚠ WARNING: PRIVATE_KEY not found in .env file!")
-        print("  Capture will not be signed.")
-        signature = "UNSIGNED_NO_PRIVATE_KEY"
-    else:
-        if not private_key.startswith('0x'):
-            private_key = '0x' + private_key
+def save_depth_capture(imgL, other_views, disparity, timestamp, signer=None, encoder=None):
+    """Save depth capture as signed JSON (unsigned when the device has no key)"""
     
     print("\n" + "="*70)
     print(f"CAPTURING DEPTH DATA - Timestamp: {timestamp}")
     print("="*70)
     
-    # Convert images to base64
+    # Convert images to base64 (both encoded in parallel when an encoder is given)
     print("Encoding images to base64...")
-    base_image_b64 = image_to_base64(imgL)
-    depth_image_b64 = image_to_base64(other_views)
+    if encoder is not None:
+        encoded = encoder.encode({'baseImage': imgL, 'depthImage': other_views})
+        base_image_b64 = base64.b64encode(encoded['baseImage']).decode('utf-8')
+        depth_image_b64 = base64.b64encode(encoded['depthImage']).decode('utf-8')
+    else:
+        base_image_b64 = image_to_base64(imgL)
+        depth_image_b64 = image_to_base64(other_views)
     
     # Compress depth data
     print("Compressing depth data...")
@@ -160,22 +133,24 @@ def save_depth_capture(imgL, other_views, disparity, timestamp):
         'depthData': depth_data
     }
     
-    # Sign the data
-    if private_key and private_key != "UNSIGNED_NO_PRIVATE_KEY":
-        print("Signing data with EIP-191...")
+    # Sign a manifest of per-component digests rather than the full JSON text
+    manifest = build_manifest(data_obj)
+    
+    if signer is not None:
+        print("Signing component manifest with EIP-191...")
         try:
-            signature = sign_data_eip191(data_obj, private_key)
-            signer_address = Account.from_key(private_key).address
-            print(f"✓ Signed by: {signer_address}")
+            signature = signer.sign(manifest)
+            print(f"✓ Signed by: {signer.address}")
         except Exception as e:
             print(f"⚠ Signature failed: {e}")
             signature = f"SIGNATURE_ERROR_{e}"
     else:
-        signature = "UNSIGNED_NO_PRIVATE_KEY"
+        signature = UNSIGNED
     
     # Create final JSON structure
     output = {
         'data': data_obj,
+        'manifest': manifest,
         'signature': signature
     }
     
@@ -195,19 +170,12 @@ def save_depth_capture(imgL, other_views, disparity, timestamp):
     # Print reconstruction instructions
     print("\nTo recreate depth map:")
     print("```python")
-    print("import json")
-    print("import numpy as np")
     print("import cv2")
-    print("import base64")
-    print("")
-    print(f"with open('{filename}', 'r') as f:")
-    print("    data = json.load(f)")
+    print("import numpy as np")
+    print("from depth_reader import load_depth_map")
     print("")
     print("# Reconstruct depth map")
-    print("depth_data = data['data']['depthData']")
-    print("shape = tuple(depth_data['shape'])")
-    print("disparity = np.zeros(shape, dtype=np.float32)")
-    print("disparity[depth_data['indices_y'], depth_data['indices_x']] = depth_data['values']")
+    print(f"disparity = load_depth_map('{filename}')")
     print("")
     print("# Visualize")
     print("mask = disparity > 0")
@@ -220,8 +188,62 @@ def save_depth_capture(imgL, other_views, disparity, timestamp):
     
     return filename
 
-def run_five_view():
-    """Run stereo depth with 5-view output"""
+def process_capture(job, encoder, signer=None):
+    """Encode, sign and save one capture (runs on the capture worker thread)"""
+    filename = save_depth_capture(job['imgL'], job['other_views'], job['disparity'], job['timestamp'], signer, encoder)
+    return f"✓ Saved signed capture\n{filename}", STATUS_INFO, 3
+
+def build_depth_pipeline(mapL1, mapL2, mapR1, mapR2, min_disp=0, num_disp=96,
+                         disparity_mode=DISPARITY_MODE, roi=None):
+    """Build the rectify -> disparity -> visualize pipeline for run_five_view
+
+    Frames are dicts submitted with 'frameL', 'frameR', 'swap' and 'blend';
+    each stage adds its outputs to the dict and the display loop reads them
+    back from `pipeline.get()`.
+    """
+    def rectify(frame):
+        if frame['swap']:
+            imgL_raw, imgR_raw = frame['frameR'], frame['frameL']
+        else:
+            imgL_raw, imgR_raw = frame['frameL'], frame['frameR']
+        frame['imgL'] = cv2.remap(imgL_raw, mapL1, mapL2, cv2.INTER_LINEAR)
+        frame['imgR'] = cv2.remap(imgR_raw, mapR1, mapR2, cv2.INTER_LINEAR)
+        return frame
+
+    def disparity(frame, engine):
+        frame['disparity'] = engine.compute(frame['imgL'], frame['imgR'])
+        return frame
+
+    def visualize(frame, colorizer):
+        depth_color = colorizer.colorize(frame['disparity'])
+        frame['depth_color'] = depth_color
+        frame['depth_enhanced'] = create_depth_overlay_blend(frame['imgL'], depth_color, frame['blend'])
+        frame['depth_advanced'] = compute_enhanced_depth(frame['imgL'])
+        return frame
+
+    stages = [
+        Stage('rectify', rectify, workers=PIPELINE_WORKERS['rectify'],
+              maxsize=PIPELINE_QUEUE_SIZE, drop=PIPELINE_DROP),
+        # SGBM matchers keep internal buffers, so each worker gets its own engine;
+        # stateful engines (temporal) need every frame, so they get one worker
+        Stage('disparity', disparity, workers=disparity_workers(disparity_mode, PIPELINE_WORKERS['disparity']),
+              maxsize=PIPELINE_QUEUE_SIZE, drop=PIPELINE_DROP,
+              init=lambda: create_disparity_engine(disparity_mode, min_disp=min_disp,
+                                                   num_disp=num_disp, roi=roi)),
+        # Depth views are written into reused buffers: enough for the frames
+        # queued behind this stage, the one on screen and the one being drawn
+        Stage('visualize', visualize, workers=PIPELINE_WORKERS['visualize'],
+              maxsize=PIPELINE_QUEUE_SIZE, drop=PIPELINE_DROP,
+              init=lambda: DepthColorizer(min_disp, num_disp, buffers=PIPELINE_QUEUE_SIZE + 2)),
+    ]
+    return Pipeline(stages, output_size=PIPELINE_QUEUE_SIZE, output_drop=PIPELINE_DROP)
+
+def run_five_view(replay=None, replay_fps=None, loop=True, disparity_mode=DISPARITY_MODE):
+    """Run stereo depth with 5-view output
+
+    Pass `replay` (a directory of left_*/right_* pairs, .npz or side-by-side
+    video) to run from recorded frames instead of the cameras.
+    """
     
     if not os.path.exists(PARAM_FILE):
         print("Error: Calibration file not found!")
@@ -230,52 +252,29 @@ def run_five_view():
     
     # Load calibration
     print("Loading calibration...")
-    data = np.load(PARAM_FILE)
-    mapL1, mapL2 = data['mapL1'], data['mapL2']
-    mapR1, mapR2 = data['mapR1'], data['mapR2']
+    mapL1, mapL2, mapR1, mapR2 = load_rectification_maps(PARAM_FILE)
+    roi = load_valid_roi(PARAM_FILE)
     print("✓ Calibration loaded")
     
-    # Setup cameras
-    print("Opening cameras...")
-    capL = cv2.VideoCapture(LEFT_PATH)
-    capR = cv2.VideoCapture(RIGHT_PATH)
-    
-    for cap in [capL, capR]:
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, WIDTH)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, HEIGHT)
-        cap.set(cv2.CAP_PROP_FPS, FPS)
-        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
-        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-    
-    if not capL.isOpened() or not capR.isOpened():
-        print("❌ Error: Cannot open cameras!")
+    # Setup cameras (or a recorded replay)
+    if replay is None:
+        print("Opening cameras...")
+    source = open_frame_source(replay, replay_fps, loop, LEFT_PATH, RIGHT_PATH, WIDTH, HEIGHT, FPS)
+    if source is None:
         return
-    
-    print("✓ Cameras opened")
-    
-    # Flush buffers
-    for _ in range(10):
-        capL.read()
-        capR.read()
+    if replay is None:
+        print("✓ Cameras opened")
     
     # Configure stereo matcher
-    window_size = 9
     min_disp = 0
     num_disp = 96
     
-    stereo = cv2.StereoSGBM_create(
-        minDisparity=min_disp,
-        numDisparities=num_disp,
-        blockSize=window_size,
-        P1=8 * 3 * window_size**2,
-        P2=32 * 3 * window_size**2,
-        disp12MaxDiff=1,
-        uniquenessRatio=10,
-        speckleWindowSize=100,
-        speckleRange=32,
-        preFilterCap=63,
-        mode=cv2.STEREO_SGBM_MODE_SGBM_3WAY
-    )
+    if disparity_mode == 'roi' and roi is None:
+        print("⚠ No valid ROI in calibration file, matching the full frame in grayscale")
+    print(f"✓ Disparity mode: {disparity_mode}")
+    
+    pipeline = build_depth_pipeline(mapL1, mapL2, mapR1, mapR2, min_disp, num_disp,
+                                    disparity_mode, roi).start()
     
     print("\n" + "="*70)
     print("STEREO DEPTH SYSTEM - 5 VIEW DISPLAY")
@@ -292,81 +291,86 @@ def run_five_view():
     print("="*70 + "\n")
     
     fps_times = deque(maxlen=30)
-    blend_strength = 0.6
-    swap_cameras = False
+    canvas = FiveViewCanvas(WIDTH, HEIGHT, [
+        ("Left Camera", (0, 255, 0)),
+        ("Right Camera", (0, 255, 0)),
+        ("Stereo Depth Map", (255, 255, 255)),
+        ("Depth-Enhanced View", (0, 255, 0)),
+        ("Advanced Depth Visualization", (0, 255, 0), 0.6),
+    ])
+    settings = {'blend_strength': 0.6, 'swap_cameras': False}
     capture_count = 0
+    last_timestamp = 0
+    avg_fps = 0.0
+    
+    # Encoding and signing run on a background worker
+    status = StatusOverlay()
+    # Key derivation happens once here, not per capture
+    signer = DeviceSigner.from_env()
+    encoder = JpegEncoder(JPEG_SETTINGS)
+    capture_worker = CaptureWorker(lambda job: process_capture(job, encoder, signer), status)
+    
+    # Feed the newest camera pairs into the pipeline from a separate thread
+    feeding = threading.Event()
+    feeding.set()
+    
+    def feed_frames():
+        last_seq = 0
+        while feeding.is_set():
+            pair = source.latest_pair(after_seq=last_seq)
+            if pair is None:
+                if getattr(source, 'exhausted', False):
+                    break
+                continue
+            last_seq = pair.seq
+            pipeline.submit({
+                'frameL': pair.left,
+                'frameR': pair.right,
+                'timestamp': pair.ts_left,
+                'swap': settings['swap_cameras'],
+                'blend': settings['blend_strength'],
+            })
+    
+    feeder = threading.Thread(target=feed_frames, name='feeder', daemon=True)
+    feeder.start()
+    last_output = time.time()
     
     while True:
-        start_time = time.time()
-        
-        # Synchronized capture
-        capL.grab()
-        capR.grab()
-        retL, frameL = capL.retrieve()
-        retR, frameR = capR.retrieve()
-        
-        if not retL or not retR:
+        # Next finished frame from the pipeline
+        frame = pipeline.get(timeout=1.0)
+        if frame is None:
+            if not feeder.is_alive():
+                break  # replay finished and pipeline drained
             continue
         
-        # Swap if needed
-        if swap_cameras:
-            imgL_raw, imgR_raw = frameR, frameL
-        else:
-            imgL_raw, imgR_raw = frameL, frameR
-        
-        # Rectify
-        imgL = cv2.remap(imgL_raw, mapL1, mapL2, cv2.INTER_LINEAR)
-        imgR = cv2.remap(imgR_raw, mapR1, mapR2, cv2.INTER_LINEAR)
-        
-        # Compute stereo depth
-        disparity = compute_stereo_depth(imgL, imgR, stereo)
-        
-        # Create visualizations
-        depth_color = visualize_depth(disparity, min_disp, num_disp)
-        depth_enhanced = create_depth_overlay_blend(imgL, depth_color, blend_strength)
-        depth_advanced = compute_enhanced_depth(imgL)
+        imgL, imgR = frame['imgL'], frame['imgR']
+        disparity = frame['disparity']
+        depth_color = frame['depth_color']
+        depth_enhanced = frame['depth_enhanced']
+        depth_advanced = frame['depth_advanced']
+        blend_strength = frame['blend']
         
-        # Calculate FPS
-        fps_times.append(time.time() - start_time)
+        # Calculate FPS from the pipeline output rate
+        now = time.time()
+        fps_times.append(now - last_output)
+        last_output = now
         avg_fps = 1.0 / (np.mean(fps_times) + 1e-6)
         
-        # Add labels to each view
         fps_color = (0, 255, 0) if avg_fps > 10 else (0, 165, 255) if avg_fps > 5 else (0, 0, 255)
         
-        # View 1: Left Camera
-        view1 = imgL.copy()
-        cv2.putText(view1, "Left Camera", (10, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        # Views go straight into their canvas tiles (labels are stamped from a cached raster)
+        canvas.set_view(0, imgL)
+        canvas.set_view(1, imgR)
+        canvas.set_view(2, depth_color)
+        canvas.put_text(2, f"FPS: {avg_fps:.1f}", (10, 460), 0.6, fps_color)
+        canvas.set_view(3, depth_enhanced)
+        canvas.put_text(3, f"Blend: {int(blend_strength*100)}%", (10, 460), 0.6, (255, 255, 255))
+        canvas.set_view(4, depth_advanced)
+        canvas.clear_margins()
+        five_view = canvas.image
         
-        # View 2: Right Camera
-        view2 = imgR.copy()
-        cv2.putText(view2, "Right Camera", (10, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        
-        # View 3: Stereo Depth Map
-        view3 = depth_color.copy()
-        cv2.putText(view3, "Stereo Depth Map", (10, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        cv2.putText(view3, f"FPS: {avg_fps:.1f}", (10, 460),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, fps_color, 2)
-        
-        # View 4: Depth-Enhanced View
-        view4 = depth_enhanced.copy()
-        cv2.putText(view4, "Depth-Enhanced View", (10, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        cv2.putText(view4, f"Blend: {int(blend_strength*100)}%", (10, 460),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-        
-        # View 5: Advanced Depth Visualization
-        view5 = depth_advanced.copy()
-        cv2.putText(view5, "Advanced Depth Visualization", (10, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-        
-        # Create layout: 3 views on top, 2 views on bottom
-        top_row = cv2.hconcat([view1, view2, view3])
-        padding = np.zeros((HEIGHT, WIDTH // 2, 3), dtype=np.uint8)
-        bottom_row = cv2.hconcat([padding, view4, view5, padding])
-        five_view = cv2.vconcat([top_row, bottom_row])
+        # Status messages from the capture worker
+        status.draw(five_view)
         
         # Show
         cv2.imshow('Stereo Depth System - 5 View', five_view)
@@ -377,18 +381,22 @@ def run_five_view():
             break
             
         elif key == ord(' '):  # SPACEBAR - Capture signed JSON
-            timestamp = int(time.time())
+            # Unique per capture even when several are fired within a second
+            timestamp = max(int(time.time()), last_timestamp + 1)
+            last_timestamp = timestamp
             
             # Create other views composite
-            other_views_top = cv2.hconcat([view2, view3])
-            other_views_bottom = cv2.hconcat([view4, view5])
-            other_views = cv2.vconcat([other_views_top, other_views_bottom])
-            
-            # Save as signed JSON
-            filename = save_depth_capture(imgL, other_views, disparity, timestamp)
+            other_views = canvas.other_views()
             
-            capture_count += 1
-            print(f"✓ Capture #{capture_count} complete!\n")
+            # Encode, sign and save as signed JSON on the capture worker
+            job = {'timestamp': timestamp, 'imgL': imgL, 'other_views': other_views, 'disparity': disparity}
+            if capture_worker.submit(job):
+                capture_count += 1
+                status.post("Capturing signed depth data...", duration=2)
+                print(f"✓ Capture #{capture_count} queued ({capture_worker.pending} pending)")
+            else:
+                status.post("❌ Capture backlog full", duration=3, color=STATUS_ERROR)
+                print("⚠️ Capture backlog full, capture skipped")
             
         elif key == ord('s'):  # Full screenshot
             filename = f'stereo_5view_{int(time.time())}.jpg'
@@ -396,24 +404,37 @@ def run_five_view():
             print(f"✓ Saved full screenshot: {filename}")
             
         elif key == ord('+') or key == ord('='):
-            blend_strength = min(1.0, blend_strength + 0.05)
-            print(f"Blend strength: {int(blend_strength*100)}%")
+            settings['blend_strength'] = min(1.0, settings['blend_strength'] + 0.05)
+            print(f"Blend strength: {int(settings['blend_strength']*100)}%")
             
         elif key == ord('-') or key == ord('_'):
-            blend_strength = max(0.0, blend_strength - 0.05)
-            print(f"Blend strength: {int(blend_strength*100)}%")
+            settings['blend_strength'] = max(0.0, settings['blend_strength'] - 0.05)
+            print(f"Blend strength: {int(settings['blend_strength']*100)}%")
             
         elif key == ord('x'):
-            swap_cameras = not swap_cameras
-            print(f"Camera swap: {'ON' if swap_cameras else 'OFF'}")
+            settings['swap_cameras'] = not settings['swap_cameras']
+            print(f"Camera swap: {'ON' if settings['swap_cameras'] else 'OFF'}")
     
     print(f"\n✓ Average FPS: {avg_fps:.1f}")
     print(f"✓ Total captures: {capture_count}")
     
-    capL.release()
-    capR.release()
+    if capture_worker.pending:
+        print(f"Waiting for {capture_worker.pending} pending capture(s) to finish...")
+    capture_worker.stop()
+    encoder.close()
+    
+    feeding.clear()
+    feeder.join(timeout=2.0)
+    pipeline.stop()
+    pipeline.print_summary()
+    source.release()
     cv2.destroyAllWindows()
 
 
 if __name__ == '__main__':
-    run_five_view()
+    parser = add_source_arguments(argparse.ArgumentParser(description="Stereo depth 5-view display with signed JSON capture"))
+    parser.add_argument('--disparity-mode', choices=sorted(DISPARITY_MODES), default=DISPARITY_MODE,
+                        help="Disparity engine (default: %(default)s)")
+    args = parser.parse_args()
+    run_five_view(replay=args.replay, replay_fps=args.replay_fps, loop=not args.no_loop,
+                  disparity_mode=args.disparity_mode)
@@ -1,15 +1,32 @@
+import argparse
 import numpy as np
 import cv2
 import os
 from collections import deque
 import time
+import threading
 import json
 import base64
 import requests
-from eth_account import Account
-from eth_account.messages import encode_defunct
 from dotenv import load_dotenv
 
+from capture_triggers import CONTROL_SOCKET, CaptureTriggers
+from capture_worker import STATUS_ERROR, STATUS_INFO, CaptureWorker, ConsoleStatus, StatusOverlay
+from depth_codec import SPARSE_LISTS_VERSION, encode_fixed16, encoding_version
+from depth_colorizer import DepthColorizer
+from device_signer import UNSIGNED, DeviceSigner
+from frame_source import add_source_arguments, open_frame_source
+from jpeg_encoder import JpegEncoder, JpegSettings, encode_jpeg, write_jpeg
+from manifest import build_manifest
+from outbox import Outbox, PermanentFailure
+from mjpeg_server import MJPEG_HOST, MJPEG_PORT, MjpegServer
+from pipeline import Pipeline, Stage
+from preview import PREVIEW_FPS, PREVIEW_SCALE, PreviewRenderer
+from rectification import load_rectification_maps, load_valid_roi
+from stereo_depth import DISPARITY_MODES, create_disparity_engine, disparity_workers
+from uploader import BINARY_UPLOAD_PATH, JSON_UPLOAD_PATH, UPLOAD_MODES, UploadClient, parse_piece_cid, rejected
+from view_canvas import FiveViewCanvas
+
 # Load environment variables
 load_dotenv()
 
@@ -21,6 +38,38 @@ WIDTH = 640
 HEIGHT = 480
 FPS = 15
 
+# Worker threads per pipeline stage (capture runs on the StereoGrabber threads)
+PIPELINE_WORKERS = {'rectify': 1, 'disparity': 2}
+PIPELINE_QUEUE_SIZE = 2
+PIPELINE_DROP = 'drop_oldest'  # 'block', 'drop_oldest' or 'drop_newest'
+
+# Disparity engine: 'full' (BGR SGBM on the whole frame), 'roi' (grayscale, valid ROI only),
+# 'striped' (parallel bands, one per core; opt-in where benchmark.py shows it beating 'full',
+# and drop PIPELINE_WORKERS['disparity'] to 1 with it)
+# or 'temporal' (re-match only changed tiles; always runs on one disparity worker)
+DISPARITY_MODE = 'full'
+
+# Upload format: 'binary' (streamed multipart with raw JPEGs) or 'json' (base64 JSON body)
+UPLOAD_MODE = 'binary'
+# JPEG settings per output (quality 0-100, Huffman optimize, progressive)
+JPEG_SETTINGS = {
+    'baseImage': JpegSettings(quality=95, optimize=False, progressive=False),
+    'depthImage': JpegSettings(quality=95, optimize=False, progressive=False),
+}
+
+# Signed captures wait in OUTBOX_DIR until uploaded; OUTBOX_WORKERS uploads run at once
+OUTBOX_DIR = 'outbox'
+OUTBOX_WORKERS = 1
+
+# Labels of the five views (text, BGR color)
+VIEW_LABELS = [
+    ("Left Camera", (0, 255, 0)),
+    ("Right Camera", (0, 255, 0)),
+    ("Stereo Depth Map", (255, 255, 255)),
+    ("Depth-Enhanced View", (0, 255, 0)),
+    ("Depth Visualization", (0, 255, 0)),
+]
+
 def compute_stereo_depth(imgL, imgR, stereo):
     """Compute depth map using SGBM"""
     disparity = stereo.compute(imgL, imgR).astype(np.float32) / 16.0
@@ -28,8 +77,9 @@ def compute_stereo_depth(imgL, imgR, stereo):
 
 def visualize_depth(disparity, min_disp=0, num_disp=96):
     """Create depth visualization"""
+    height, width = disparity.shape[:2]
     mask = (disparity > min_disp) & (disparity < num_disp)
-    disp_vis = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    disp_vis = np.zeros((height, width, 3), dtype=np.uint8)
     
     if mask.any():
         valid_disp = disparity[mask]
@@ -38,7 +88,7 @@ def visualize_depth(disparity, min_disp=0, num_disp=96):
         
         normalized = (valid_disp - min_val) / (max_val - min_val + 1e-5) * 255
         
-        disp_vis_gray = np.zeros((HEIGHT, WIDTH), dtype=np.uint8)
+        disp_vis_gray = np.zeros((height, width), dtype=np.uint8)
         disp_vis_gray[mask] = normalized.astype(np.uint8)
         
         disp_vis_gray = cv2.medianBlur(disp_vis_gray, 5)
@@ -65,53 +115,11 @@ def fake_depth_effect(frame):
 
 def image_to_base64(image):
     """Convert OpenCV image to base64 string"""
-    _, buffer = cv2.imencode('.jpg', image)
-    return base64.b64encode(buffer).decode('utf-8')
+    return base64.b64encode(encode_jpeg(image)).decode('utf-8')
 
 def compress_depth_data(disparity):
-    """Compress depth data for JSON storage"""
-    valid_mask = disparity > 0
-    
-    depth_data = {
-        'shape': list(disparity.shape),
-        'dtype': str(disparity.dtype),
-        'min': float(np.min(disparity)),
-        'max': float(np.max(disparity)),
-        'mean': float(np.mean(disparity)),
-        'valid_pixels': int(np.sum(valid_mask))
-    }
-    
-    # Store only non-zero values with their indices for efficiency
-    if valid_mask.any():
-        indices = np.where(valid_mask)
-        values = disparity[valid_mask]
-        
-        # Convert to lists for JSON serialization
-        depth_data['indices_y'] = indices[0].tolist()
-        depth_data['indices_x'] = indices[1].tolist()
-        depth_data['values'] = values.tolist()
-    else:
-        depth_data['indices_y'] = []
-        depth_data['indices_x'] = []
-        depth_data['values'] = []
-    
-    return depth_data
-
-def sign_data_eip191(data_dict, private_key):
-    """Sign data using EIP-191 signature"""
-    # Convert data to deterministic JSON string
-    data_str = json.dumps(data_dict, sort_keys=True, separators=(',', ':'))
-    
-    # Create Ethereum account from private key
-    account = Account.from_key(private_key)
-    
-    # Encode message with EIP-191
-    message = encode_defunct(text=data_str)
-    
-    # Sign
-    signed_message = account.sign_message(message)
-    
-    return signed_message.signature.hex()
+    """Compress depth data for JSON storage (fixed-point + validity bitmap, see depth_codec)"""
+    return encode_fixed16(disparity)
 
 def save_depth_data(disparity, timestamp):
     """Save depth map data in compressed format"""
@@ -158,65 +166,25 @@ def save_depth_data(disparity, timestamp):
     
     return depth_file, json_file
 
-def show_popup_message(display_frame, message, duration=3, color=(0, 255, 0)):
-    """Display a popup message on the OpenCV window"""
-    overlay = display_frame.copy()
-    
-    # Create semi-transparent overlay
-    cv2.rectangle(overlay, (0, 0), (overlay.shape[1], overlay.shape[0]), (0, 0, 0), -1)
-    overlay = cv2.addWeighted(overlay, 0.7, display_frame, 0.3, 0)
-    
-    # Calculate text size and position (centered)
-    font = cv2.FONT_HERSHEY_SIMPLEX
-    font_scale = 0.7
-    thickness = 2
-    
-    # Split message into lines and handle long CID strings
-    lines = message.split('\n')
-    # Break long lines (like CID) into multiple lines if needed
-    max_chars_per_line = 50
-    processed_lines = []
-    for line in lines:
-        if len(line) > max_chars_per_line:
-            # Break long line into chunks
-            for i in range(0, len(line), max_chars_per_line):
-                processed_lines.append(line[i:i+max_chars_per_line])
-        else:
-            processed_lines.append(line)
-    
-    text_height = 35
-    total_height = len(processed_lines) * text_height
-    start_y = (overlay.shape[0] - total_height) // 2
-    
-    # Draw each line
-    for i, line in enumerate(processed_lines):
-        text_size = cv2.getTextSize(line, font, font_scale, thickness)[0]
-        text_x = (overlay.shape[1] - text_size[0]) // 2
-        text_y = start_y + (i + 1) * text_height
-        
-        # Draw text with shadow for better visibility
-        cv2.putText(overlay, line, (text_x + 2, text_y + 2), font, font_scale, (0, 0, 0), thickness + 1)
-        cv2.putText(overlay, line, (text_x, text_y), font, font_scale, color, thickness)
-    
-    cv2.imshow('Stereo Depth System - 5 View', overlay)
-    cv2.waitKey(int(duration * 1000))
+def create_signed_payload(imgL, other_views, disparity, timestamp, signer=None, binary=False, encoded=None):
+    """Create signed payload (unsigned when the device has no key)
 
-def create_signed_payload(imgL, other_views, disparity, timestamp):
-    """Create signed payload using existing logic"""
-    private_key = os.getenv('PRIVATE_KEY')
-    
-    if not private_key:
-        print("⚠ WARNING: PRIVATE_KEY not found in environment!")
-        print("  Capture will not be signed.")
-        signature = "UNSIGNED_NO_PRIVATE_KEY"
+    With `binary` the images stay raw JPEG buffers for a streamed multipart
+    upload; the manifest digests are the same as for the base64 payload.
+    `encoded` holds JPEG buffers already made by a JpegEncoder
+    ({'baseImage': ..., 'depthImage': ...}) so the images are not encoded twice.
+    """
+    if encoded is None:
+        print("Encoding images to JPEG...")
+        encoded = {'baseImage': encode_jpeg(imgL), 'depthImage': encode_jpeg(other_views)}
+    if binary:
+        base_image = memoryview(encoded['baseImage'])
+        depth_image = memoryview(encoded['depthImage'])
     else:
-        if not private_key.startswith('0x'):
-            private_key = '0x' + private_key
-    
-    # Convert images to base64
-    print("Encoding images to base64...")
-    base_image_b64 = image_to_base64(imgL)
-    depth_image_b64 = image_to_base64(other_views)
+        # Convert images to base64
+        print("Encoding images to base64...")
+        base_image = base64.b64encode(encoded['baseImage']).decode('utf-8')
+        depth_image = base64.b64encode(encoded['depthImage']).decode('utf-8')
     
     # Compress depth data
     print("Compressing depth data...")
@@ -225,18 +193,19 @@ def create_signed_payload(imgL, other_views, disparity, timestamp):
     # Create data object
     data_obj = {
         'timestamp': timestamp,
-        'baseImage': base_image_b64,
-        'depthImage': depth_image_b64,
+        'baseImage': base_image,
+        'depthImage': depth_image,
         'depthData': depth_data
     }
     
-    # Sign the data
-    if private_key:
-        print("Signing data with EIP-191...")
+    # Sign a manifest of per-component digests rather than the full JSON text
+    manifest = build_manifest(data_obj)
+    
+    if signer is not None:
+        print("Signing component manifest with EIP-191...")
         try:
-            signature = sign_data_eip191(data_obj, private_key)
-            signer_address = Account.from_key(private_key).address
-            print(f"✓ Signed by: {signer_address}")
+            signature = signer.sign(manifest)
+            print(f"✓ Signed by: {signer.address}")
             print(f"✓ Signature: {signature[:20]}...{signature[-20:]}")
         except Exception as e:
             print(f"⚠ Signature failed: {e}")
@@ -244,11 +213,12 @@ def create_signed_payload(imgL, other_views, disparity, timestamp):
             traceback.print_exc()
             signature = f"SIGNATURE_ERROR_{e}"
     else:
-        signature = "UNSIGNED_NO_PRIVATE_KEY"
+        signature = UNSIGNED
     
     # Create final JSON structure
     payload = {
         'data': data_obj,
+        'manifest': manifest,
         'signature': signature
     }
     
@@ -263,8 +233,10 @@ def print_payload_summary(payload):
     if 'data' in payload:
         data = payload['data']
         print(f"Timestamp: {data.get('timestamp', 'N/A')}")
-        print(f"Base Image: {len(data.get('baseImage', ''))} chars (base64)")
-        print(f"Depth Image: {len(data.get('depthImage', ''))} chars (base64)")
+        for name, label in [('baseImage', 'Base Image'), ('depthImage', 'Depth Image')]:
+            image = data.get(name, '')
+            unit = 'chars (base64)' if isinstance(image, str) else 'bytes (JPEG)'
+            print(f"{label}: {len(image)} {unit}")
         if 'depthData' in data:
             depth_data = data['depthData']
             print(f"Depth Data:")
@@ -274,37 +246,42 @@ def print_payload_summary(payload):
             print(f"  - Max: {depth_data.get('max', 'N/A')}")
             print(f"  - Mean: {depth_data.get('mean', 'N/A')}")
             print(f"  - Valid Pixels: {depth_data.get('valid_pixels', 'N/A')}")
-            print(f"  - Values Count: {len(depth_data.get('values', []))}")
+            version = encoding_version(depth_data)
+            if version == SPARSE_LISTS_VERSION:
+                print(f"  - Encoding: v{version} sparse lists, {len(depth_data.get('values', []))} values")
+            else:
+                print(f"  - Encoding: v{version} {depth_data.get('encoding', 'unknown')}")
             print(f"  - (Full depthData object excluded from print - too large)")
     print("="*70 + "\n")
 
-def upload_to_server(payload, server_url):
-    """Upload witness data to the server"""
+def upload_to_server(payload, uploader, mode=UPLOAD_MODE):
+    """Upload witness data through the shared UploadClient ('binary' multipart stream or 'json')
+
+    Raises PermanentFailure when the server rejects the capture (4xx), so
+    the outbox does not send it again.
+    """
     try:
         # Print payload summary before sending
         print_payload_summary(payload)
         
         # Post to server
-        upload_url = f"{server_url}/api/upload"
-        print(f"📤 Uploading to: {upload_url}")
-        response = requests.post(upload_url, json=payload, headers={'Content-Type': 'application/json'}, timeout=150)
+        path = BINARY_UPLOAD_PATH if mode == 'binary' else JSON_UPLOAD_PATH
+        print(f"📤 Uploading to: {uploader.server_url}{path}")
+        response = uploader.upload(payload, mode)
         
         if response.status_code == 200:
             result = response.json()
-            # Extract pieceCid - handle both object and string formats
-            piece_cid_raw = result.get('data', {}).get('pieceCid', 'N/A')
-            if piece_cid_raw and isinstance(piece_cid_raw, dict) and '/' in piece_cid_raw:
-                piece_cid = piece_cid_raw['/']
-            elif piece_cid_raw:
-                piece_cid = str(piece_cid_raw)
-            else:
-                piece_cid = 'N/A'
+            piece_cid = parse_piece_cid(result)
             print(f"✅ Upload successful! PieceCID: {piece_cid}")
             return True, result, piece_cid
         else:
             print(f"❌ Upload failed with status {response.status_code}: {response.text}")
+            if rejected(response.status_code):
+                raise PermanentFailure(f"rejected by the server with status {response.status_code}")
             return False, None, None
             
+    except PermanentFailure:
+        raise
     except requests.exceptions.RequestException as e:
         print(f"❌ Network error during upload: {e}")
         return False, None, None
@@ -312,62 +289,293 @@ def upload_to_server(payload, server_url):
         print(f"❌ Error during upload: {e}")
         return False, None, None
 
-def run_five_view():
-    """Run stereo depth with 5-view output"""
-    
-    if not os.path.exists(PARAM_FILE):
-        print("Error: Calibration file not found!")
-        print("Run calibration first: python calibration_script.py")
-        return
-    
-    # Load calibration
-    print("Loading calibration...")
-    data = np.load(PARAM_FILE)
-    mapL1, mapL2 = data['mapL1'], data['mapL2']
-    mapR1, mapR2 = data['mapR1'], data['mapR2']
-    print("✓ Calibration loaded")
-    
-    # Setup cameras
-    print("Opening cameras...")
-    capL = cv2.VideoCapture(LEFT_PATH)
-    capR = cv2.VideoCapture(RIGHT_PATH)
-    
-    for cap in [capL, capR]:
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, WIDTH)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, HEIGHT)
-        cap.set(cv2.CAP_PROP_FPS, FPS)
-        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
-        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-    
-    if not capL.isOpened() or not capR.isOpened():
-        print("❌ Error: Cannot open cameras!")
+def process_capture(job, outbox, encoder, signer=None):
+    """Save and sign one capture and queue it in the outbox (runs on the capture worker thread)"""
+    timestamp = job['timestamp']
+    imgL, other_views, disparity = job['imgL'], job['other_views'], job['disparity']
+    
+    # Encode both images once, in parallel; the same bytes go to disk and into the payload
+    encoded = encoder.encode({'baseImage': imgL, 'depthImage': other_views})
+    
+    # Save left image separately
+    left_filename = f'capture_{timestamp}_left.jpg'
+    write_jpeg(left_filename, encoded['baseImage'])
+    print(f"\n✓ Saved left image: {left_filename}")
+    
+    # Save all other views combined
+    other_filename = f'capture_{timestamp}_views.jpg'
+    write_jpeg(other_filename, encoded['depthImage'])
+    print(f"✓ Saved other views: {other_filename}")
+    
+    # Save depth data
+    depth_file, json_file = save_depth_data(disparity, timestamp)
+    
+    # Create signed payload using existing logic
+    print(f"\n📤 Creating signed payload")
+    payload = create_signed_payload(imgL, other_views, disparity, timestamp, signer, binary=True, encoded=encoded)
+    
+    # The outbox keeps the signed capture until the server has it
+    entry_id = outbox.add(payload)
+    print(f"✓ Queued for upload: {outbox.pending_dir}/{entry_id} ({outbox.pending} pending)\n")
+    return "✓ Capture signed\n\nQueued for upload", STATUS_INFO, 2
+
+def upload_status(status, outbox):
+    """Outbox on_result callback that reports each upload attempt on the live view"""
+    def on_result(entry_id, success, piece_cid, permanent):
+        if success:
+            print(f"✅ Upload complete! PieceCID: {piece_cid}\n")
+            status.post(f"✅ Upload Successful!\n\nPieceCID:\n{piece_cid}", 5)
+        elif permanent:
+            status.post(f"❌ Upload Rejected\n\nMoved to {outbox.failed_dir}", 3, STATUS_ERROR)
+        else:
+            status.post(f"❌ Upload Failed\n\nKept in outbox ({outbox.pending} pending)", 3, STATUS_ERROR)
+    return on_result
+
+def render_capture_views(frame, min_disp=0, num_disp=96):
+    """Right | depth map / depth-enhanced | overlay composite of one pipeline frame
+
+    The pipeline renders no views (the preview is scaled and rate-limited,
+    headless runs have none), so a capture renders its full-resolution
+    depthImage from the frame only when it is taken.
+    """
+    depth_color = visualize_depth(frame['disparity'], min_disp, num_disp)
+    views = [
+        frame['imgR'].copy(),
+        depth_color,
+        create_depth_overlay_blend(frame['imgL'], depth_color, frame['blend']),
+        fake_depth_effect(frame['imgL']),
+    ]
+    for view, (text, color) in zip(views, VIEW_LABELS[1:]):
+        cv2.putText(view, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+    return cv2.vconcat([cv2.hconcat(views[:2]), cv2.hconcat(views[2:])])
+
+def process_frame_capture(job, outbox, encoder, signer=None, min_disp=0, num_disp=96):
+    """process_capture for a job holding a pipeline frame: renders its depthImage composite first"""
+    job['other_views'] = render_capture_views(job, min_disp, num_disp)
+    return process_capture(job, outbox, encoder, signer)
+
+def capture_job(frame, timestamp):
+    """Capture job for the capture worker; pipeline frames are fresh arrays, so it can hold them"""
+    return {'timestamp': timestamp, 'imgL': frame['imgL'], 'imgR': frame['imgR'],
+            'disparity': frame['disparity'], 'blend': frame['blend']}
+
+def build_preview(min_disp=0, num_disp=96, scale=PREVIEW_SCALE, fps=PREVIEW_FPS, mjpeg=None):
+    """PreviewRenderer drawing the 5-view display at `scale` of the camera size, at most `fps` a second
+
+    With an MjpegServer as `mjpeg`, every preview frame is also published
+    to it (left image, depth map and composite), encoded on the preview
+    thread and only for views someone is watching.
+    """
+    width, height = round(WIDTH * scale), round(HEIGHT * scale)
+    # Used only on the preview thread
+    colorizer = DepthColorizer(min_disp, num_disp, buffers=1)
+    
+    def shrink(image, interpolation=cv2.INTER_AREA):
+        if image.shape[1] == width and image.shape[0] == height:
+            return image
+        return cv2.resize(image, (width, height), interpolation=interpolation)
+    
+    def render(frame, canvas):
+        imgL, imgR = shrink(frame['imgL']), shrink(frame['imgR'])
+        # Nearest neighbour keeps invalid pixels invalid
+        depth_color = colorizer.colorize(shrink(frame['disparity'], cv2.INTER_NEAREST))
+        depth_fps, preview_fps = frame['depth_fps'], preview.fps
+        fps_color = (0, 255, 0) if depth_fps > 10 else (0, 165, 255) if depth_fps > 5 else (0, 0, 255)
+        
+        canvas.set_view(0, imgL)
+        canvas.set_view(1, imgR)
+        canvas.set_view(2, depth_color)
+        canvas.put_text(2, f"Depth FPS: {depth_fps:.1f}  Preview: {preview_fps:.1f}", (10, 460), 0.6, fps_color)
+        canvas.set_view(3, create_depth_overlay_blend(imgL, depth_color, frame['blend']))
+        canvas.put_text(3, f"Blend: {int(frame['blend']*100)}%", (10, 460), 0.6, (255, 255, 255))
+        canvas.set_view(4, fake_depth_effect(imgL))
+        canvas.clear_margins()
+        
+        if mjpeg is not None:
+            # Before the display loop draws its status overlay onto the canvas
+            mjpeg.publish('left', imgL)
+            mjpeg.publish('depth', depth_color)
+            mjpeg.publish('composite', canvas.image)
+    
+    preview = PreviewRenderer(render, lambda: FiveViewCanvas(width, height, VIEW_LABELS, text_scale=scale), fps)
+    return preview
+
+def build_depth_pipeline(mapL1, mapL2, mapR1, mapR2, min_disp=0, num_disp=96,
+                         disparity_mode=DISPARITY_MODE, roi=None):
+    """Build the rectify -> disparity pipeline for run_five_view and run_headless
+
+    Frames are dicts submitted with 'frameL', 'frameR', 'swap' and 'blend';
+    each stage adds its outputs to the dict and the main loop reads them
+    back from `pipeline.get()`. Views are not rendered here: the preview
+    renders on its own thread and captures render their own composite.
+    """
+    def rectify(frame):
+        if frame['swap']:
+            imgL_raw, imgR_raw = frame['frameR'], frame['frameL']
+        else:
+            imgL_raw, imgR_raw = frame['frameL'], frame['frameR']
+        frame['imgL'] = cv2.remap(imgL_raw, mapL1, mapL2, cv2.INTER_LINEAR)
+        frame['imgR'] = cv2.remap(imgR_raw, mapR1, mapR2, cv2.INTER_LINEAR)
+        return frame
+
+    def disparity(frame, engine):
+        frame['disparity'] = engine.compute(frame['imgL'], frame['imgR'])
+        return frame
+
+    stages = [
+        Stage('rectify', rectify, workers=PIPELINE_WORKERS['rectify'],
+              maxsize=PIPELINE_QUEUE_SIZE, drop=PIPELINE_DROP),
+        # SGBM matchers keep internal buffers, so each worker gets its own engine;
+        # stateful engines (temporal) need every frame, so they get one worker
+        Stage('disparity', disparity, workers=disparity_workers(disparity_mode, PIPELINE_WORKERS['disparity']),
+              maxsize=PIPELINE_QUEUE_SIZE, drop=PIPELINE_DROP,
+              init=lambda: create_disparity_engine(disparity_mode, min_disp=min_disp,
+                                                   num_disp=num_disp, roi=roi)),
+    ]
+    return Pipeline(stages, output_size=PIPELINE_QUEUE_SIZE, output_drop=PIPELINE_DROP)
+
+class DepthSession:
+    """Setup and shutdown shared by run_five_view and run_headless
+
+    Holds the frame source, the running depth pipeline with the thread
+    that feeds it, and the capture path behind `capture_worker`: device
+    signer, upload client, outbox and JPEG encoder. The two modes only
+    add their own front end (window and keys, or capture triggers) and
+    call `close()` when done.
+    """
+
+    def __init__(self, source, pipeline, status, upload_mode=UPLOAD_MODE, outbox_workers=OUTBOX_WORKERS,
+                 capture=None, min_disp=0, num_disp=96):
+        self.source = source
+        self.pipeline = pipeline
+        self.min_disp = min_disp
+        self.num_disp = num_disp
+        self.settings = {'blend_strength': 0.6, 'swap_cameras': False}
+
+        # Key derivation happens once here, not per capture
+        self.signer = DeviceSigner.from_env()
+        # One keep-alive connection pool for every upload
+        self.uploader = UploadClient(os.getenv('SERVER_URL', 'http://localhost:3000'))
+        self.outbox = Outbox(OUTBOX_DIR, send=lambda payload: upload_to_server(payload, self.uploader, upload_mode),
+                             workers=outbox_workers)
+        self.outbox.on_result = upload_status(status, self.outbox)
+        self.outbox.start()
+        self.encoder = JpegEncoder(JPEG_SETTINGS)
+        # Encoding and signing run on a background worker, uploads drain from the on-disk outbox
+        self.capture_worker = CaptureWorker(capture or self.process_capture, status)
+
+        self._feeding = threading.Event()
+        self.feeder = None
+
+    @classmethod
+    def open(cls, replay=None, replay_fps=None, loop=True, disparity_mode=DISPARITY_MODE, **kwargs):
+        """Load calibration, open the cameras (or `replay`) and start the depth pipeline; None on failure"""
+        if not os.path.exists(PARAM_FILE):
+            print("Error: Calibration file not found!")
+            print("Run calibration first: python calibration_script.py")
+            return None
+        
+        # Load calibration
+        print("Loading calibration...")
+        mapL1, mapL2, mapR1, mapR2 = load_rectification_maps(PARAM_FILE)
+        roi = load_valid_roi(PARAM_FILE)
+        print("✓ Calibration loaded")
+        
+        # Setup cameras (or a recorded replay)
+        if replay is None:
+            print("Opening cameras...")
+        source = open_frame_source(replay, replay_fps, loop, LEFT_PATH, RIGHT_PATH, WIDTH, HEIGHT, FPS)
+        if source is None:
+            return None
+        if replay is None:
+            print("✓ Cameras opened")
+        
+        # Configure stereo matcher
+        min_disp = 0
+        num_disp = 96
+        
+        if disparity_mode == 'roi' and roi is None:
+            print("⚠ No valid ROI in calibration file, matching the full frame in grayscale")
+        print(f"✓ Disparity mode: {disparity_mode}")
+        
+        pipeline = build_depth_pipeline(mapL1, mapL2, mapR1, mapR2, min_disp, num_disp,
+                                        disparity_mode, roi).start()
+        return cls(source, pipeline, min_disp=min_disp, num_disp=num_disp, **kwargs)
+
+    def process_capture(self, job):
+        """Render, sign and queue one capture job (runs on the capture worker thread)"""
+        return process_frame_capture(job, self.outbox, self.encoder, self.signer, self.min_disp, self.num_disp)
+
+    def start_feeder(self):
+        """Feed the newest camera pairs into the pipeline from a separate thread"""
+        def feed_frames():
+            last_seq = 0
+            while self._feeding.is_set():
+                pair = self.source.latest_pair(after_seq=last_seq)
+                if pair is None:
+                    if getattr(self.source, 'exhausted', False):
+                        break
+                    continue
+                last_seq = pair.seq
+                self.pipeline.submit({
+                    'frameL': pair.left,
+                    'frameR': pair.right,
+                    'timestamp': pair.ts_left,
+                    'swap': self.settings['swap_cameras'],
+                    'blend': self.settings['blend_strength'],
+                })
+        
+        self._feeding.set()
+        self.feeder = threading.Thread(target=feed_frames, name='feeder', daemon=True)
+        self.feeder.start()
+        return self.feeder
+
+    def close(self):
+        """Finish pending captures and uploads, then stop the feeder, pipeline and source"""
+        if self.capture_worker.pending:
+            print(f"Waiting for {self.capture_worker.pending} pending capture(s) to finish...")
+        self.capture_worker.stop()
+        self.encoder.close()
+        self.outbox.stop(timeout=10)
+        if self.outbox.pending:
+            print(f"⚠ {self.outbox.pending} capture(s) left in {self.outbox.pending_dir}, they upload on the next start")
+        self.uploader.print_summary()
+        self.uploader.close()
+        
+        self._feeding.clear()
+        if self.feeder is not None:
+            self.feeder.join(timeout=2.0)
+        self.pipeline.stop()
+        self.pipeline.print_summary()
+        self.source.release()
+
+def stop_preview(preview, mjpeg=None):
+    """Stop the preview renderer and MJPEG server (either may be None) and print their summaries"""
+    if preview is not None:
+        preview.stop()
+        preview.print_summary()
+    if mjpeg is not None:
+        mjpeg.stop()
+        mjpeg.print_summary()
+
+def run_five_view(replay=None, replay_fps=None, loop=True, disparity_mode=DISPARITY_MODE,
+                  upload_mode=UPLOAD_MODE, outbox_workers=OUTBOX_WORKERS,
+                  preview_scale=PREVIEW_SCALE, preview_fps=PREVIEW_FPS, mjpeg_port=None, mjpeg_host=MJPEG_HOST):
+    """Run stereo depth with 5-view output
+
+    Pass `replay` (a directory of left_*/right_* pairs, .npz or side-by-side
+    video) to run from recorded frames instead of the cameras. The preview
+    is rendered at `preview_scale` and at most `preview_fps` on its own
+    thread; depth frames and captures do not wait for it. With `mjpeg_port`
+    the preview is also streamed over HTTP on `mjpeg_host` (see MjpegServer).
+    """
+    
+    status = StatusOverlay()
+    session = DepthSession.open(replay, replay_fps, loop, disparity_mode, status=status,
+                                upload_mode=upload_mode, outbox_workers=outbox_workers)
+    if session is None:
         return
-    
-    print("✓ Cameras opened")
-    
-    # Flush buffers
-    for _ in range(10):
-        capL.read()
-        capR.read()
-    
-    # Configure stereo matcher
-    window_size = 9
-    min_disp = 0
-    num_disp = 96
-    
-    stereo = cv2.StereoSGBM_create(
-        minDisparity=min_disp,
-        numDisparities=num_disp,
-        blockSize=window_size,
-        P1=8 * 3 * window_size**2,
-        P2=32 * 3 * window_size**2,
-        disp12MaxDiff=1,
-        uniquenessRatio=10,
-        speckleWindowSize=100,
-        speckleRange=32,
-        preFilterCap=63,
-        mode=cv2.STEREO_SGBM_MODE_SGBM_3WAY
-    )
+    min_disp, num_disp = session.min_disp, session.num_disp
     
     print("\n" + "="*70)
     print("STEREO DEPTH SYSTEM - 5 VIEW DISPLAY")
@@ -378,95 +586,55 @@ def run_five_view():
     print("\nControls:")
     print("  SPACE  Capture images + depth data")
     print("  '+/-'  Adjust blend strength (depth-enhanced view)")
-    print("  's'    Save full screenshot")
+    print("  's'    Save preview screenshot")
     print("  'x'    Swap left/right cameras")
     print("  ESC    Exit")
     print("="*70 + "\n")
     
     fps_times = deque(maxlen=30)
-    blend_strength = 0.6
-    swap_cameras = False
+    mjpeg = MjpegServer(mjpeg_port, mjpeg_host).start() if mjpeg_port else None
+    preview = build_preview(min_disp, num_disp, preview_scale, preview_fps, mjpeg).start()
+    print(f"✓ Preview: {preview_scale:g}x at up to {preview_fps:g} FPS")
+    latest = None
+    five_view = None
+    settings = session.settings
+    capture_worker, outbox = session.capture_worker, session.outbox
     capture_count = 0
+    last_timestamp = 0
+    avg_fps = 0.0
+    
+    feeder = session.start_feeder()
+    pipeline = session.pipeline
+    last_output = time.time()
     
     while True:
-        start_time = time.time()
-        
-        # Synchronized capture
-        capL.grab()
-        capR.grab()
-        retL, frameL = capL.retrieve()
-        retR, frameR = capR.retrieve()
-        
-        if not retL or not retR:
-            continue
-        
-        # Swap if needed
-        if swap_cameras:
-            imgL_raw, imgR_raw = frameR, frameL
-        else:
-            imgL_raw, imgR_raw = frameL, frameR
-        
-        # Rectify
-        imgL = cv2.remap(imgL_raw, mapL1, mapL2, cv2.INTER_LINEAR)
-        imgR = cv2.remap(imgR_raw, mapR1, mapR2, cv2.INTER_LINEAR)
-        
-        # Compute stereo depth
-        disparity = compute_stereo_depth(imgL, imgR, stereo)
-        
-        # Create visualizations
-        depth_color = visualize_depth(disparity, min_disp, num_disp)
-        depth_enhanced = create_depth_overlay_blend(imgL, depth_color, blend_strength)
-        depth_overlay = fake_depth_effect(imgL)
-        
-        # Calculate FPS
-        fps_times.append(time.time() - start_time)
-        avg_fps = 1.0 / (np.mean(fps_times) + 1e-6)
-        
-        # Add labels to each view
-        fps_color = (0, 255, 0) if avg_fps > 10 else (0, 165, 255) if avg_fps > 5 else (0, 0, 255)
-        
-        # View 1: Left Camera
-        view1 = imgL.copy()
-        cv2.putText(view1, "Left Camera", (10, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        
-        # View 2: Right Camera
-        view2 = imgR.copy()
-        cv2.putText(view2, "Right Camera", (10, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        
-        # View 3: Stereo Depth Map
-        view3 = depth_color.copy()
-        cv2.putText(view3, "Stereo Depth Map", (10, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        cv2.putText(view3, f"FPS: {avg_fps:.1f}", (10, 460),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, fps_color, 2)
+        # Next finished frame from the pipeline; a short wait keeps keys and the preview responsive
+        frame = pipeline.get(timeout=0.01)
+        if frame is not None:
+            # Calculate FPS from the pipeline output rate
+            now = time.time()
+            fps_times.append(now - last_output)
+            last_output = now
+            avg_fps = 1.0 / (np.mean(fps_times) + 1e-6)
+            frame['depth_fps'] = avg_fps
+            latest = frame
+            # Never blocks: a preview still busy with an older frame skips it
+            preview.submit(frame)
+        elif not feeder.is_alive():
+            break  # replay finished and pipeline drained
         
-        # View 4: Depth-Enhanced View
-        view4 = depth_enhanced.copy()
-        cv2.putText(view4, "Depth-Enhanced View", (10, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        cv2.putText(view4, f"Blend: {int(blend_strength*100)}%", (10, 460),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-        
-        # View 5: Depth Overlay Visualization
-        view5 = depth_overlay.copy()
-        cv2.putText(view5, "Depth Visualization", (10, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        
-        # Create layout: 3 views on top, 2 views on bottom
-        # Top row: Left | Right | Depth Map
-        top_row = cv2.hconcat([view1, view2, view3])
-        
-        # Bottom row: Depth-Enhanced | Depth Overlay (centered)
-        padding = np.zeros((HEIGHT, WIDTH // 2, 3), dtype=np.uint8)
-        bottom_row = cv2.hconcat([padding, view4, view5, padding])
-        
-        # Combine
-        five_view = cv2.vconcat([top_row, bottom_row])
-        
-        # Show
-        cv2.imshow('Stereo Depth System - 5 View', five_view)
+        canvas = preview.take()
+        if canvas is not None:
+            five_view = canvas.image
+            # Status messages and pending captures from the capture worker
+            status.draw(five_view)
+            uploading = capture_worker.pending + outbox.pending
+            if uploading:
+                cv2.putText(five_view, f"Uploading: {uploading}", (five_view.shape[1] - 200, 30),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+            
+            # Show
+            cv2.imshow('Stereo Depth System - 5 View', five_view)
         
         # Handle keys
         key = cv2.waitKey(1) & 0xFF
@@ -474,76 +642,195 @@ def run_five_view():
             break
             
         elif key == ord(' '):  # SPACEBAR - Capture
-            timestamp = int(time.time())
-            
-            # Save left image separately
-            left_filename = f'capture_{timestamp}_left.jpg'
-            cv2.imwrite(left_filename, imgL)
-            print(f"\n✓ Saved left image: {left_filename}")
+            if latest is None:
+                print("⚠ No depth frame yet, capture skipped")
+                continue
+            # Unique per capture even when several are fired within a second
+            timestamp = max(int(time.time()), last_timestamp + 1)
+            last_timestamp = timestamp
             
-            # Save all other views combined
-            # Create a composite without the left camera
-            other_views_top = cv2.hconcat([view2, view3])
-            other_views_bottom = cv2.hconcat([view4, view5])
-            other_views = cv2.vconcat([other_views_top, other_views_bottom])
-            
-            other_filename = f'capture_{timestamp}_views.jpg'
-            cv2.imwrite(other_filename, other_views)
-            print(f"✓ Saved other views: {other_filename}")
-            
-            # Save depth data
-            depth_file, json_file = save_depth_data(disparity, timestamp)
-            
-            # Show popup message
-            server_url = os.getenv('SERVER_URL', 'http://localhost:3000')
-            popup_message = "Witness image captured,\nsigning and sending it to\nFilecoinOnchain Cloud"
-            show_popup_message(five_view, popup_message, duration=3)
-            
-            # Create signed payload using existing logic
-            print(f"\n📤 Creating signed payload and uploading to server: {server_url}")
-            payload = create_signed_payload(imgL, other_views, disparity, timestamp)
-            
-            # Upload to server
-            success, result, piece_cid = upload_to_server(payload, server_url)
-            
-            if success and piece_cid:
-                # Display success message with CID
-                success_message = f"✅ Upload Successful!\n\nPieceCID:\n{piece_cid}"
-                show_popup_message(five_view, success_message, duration=5, color=(0, 255, 0))
-                print(f"✅ Upload complete!\n")
+            # Captured at full resolution from the newest depth frame, not
+            # the preview; the worker renders its composite without the left camera
+            if capture_worker.submit(capture_job(latest, timestamp)):
+                capture_count += 1
+                status.post("Witness image captured,\nsigning and sending it to\nFilecoinOnchain Cloud", duration=3)
+                print(f"✓ Capture #{capture_count} queued ({capture_worker.pending} pending)")
             else:
-                # Display error message
-                error_message = "❌ Upload Failed\n\nCheck console for details"
-                show_popup_message(five_view, error_message, duration=3, color=(0, 0, 255))
-                print(f"⚠️ Upload failed, but files saved locally.\n")
-            
-            capture_count += 1
-            print(f"✓ Capture #{capture_count} complete!\n")
+                status.post("❌ Capture backlog full\n\nWait for pending uploads", duration=3, color=STATUS_ERROR)
+                print("⚠️ Capture backlog full, capture skipped")
             
-        elif key == ord('s'):  # Full screenshot
+        elif key == ord('s'):  # Preview screenshot
+            if five_view is None:
+                continue
             filename = f'stereo_5view_{int(time.time())}.jpg'
             cv2.imwrite(filename, five_view)
-            print(f"✓ Saved full screenshot: {filename}")
+            print(f"✓ Saved preview screenshot: {filename}")
             
         elif key == ord('+') or key == ord('='):
-            blend_strength = min(1.0, blend_strength + 0.05)
-            print(f"Blend strength: {int(blend_strength*100)}%")
+            settings['blend_strength'] = min(1.0, settings['blend_strength'] + 0.05)
+            print(f"Blend strength: {int(settings['blend_strength']*100)}%")
             
         elif key == ord('-') or key == ord('_'):
-            blend_strength = max(0.0, blend_strength - 0.05)
-            print(f"Blend strength: {int(blend_strength*100)}%")
+            settings['blend_strength'] = max(0.0, settings['blend_strength'] - 0.05)
+            print(f"Blend strength: {int(settings['blend_strength']*100)}%")
             
         elif key == ord('x'):
-            swap_cameras = not swap_cameras
-            print(f"Camera swap: {'ON' if swap_cameras else 'OFF'}")
+            settings['swap_cameras'] = not settings['swap_cameras']
+            print(f"Camera swap: {'ON' if settings['swap_cameras'] else 'OFF'}")
     
     print(f"\n✓ Average FPS: {avg_fps:.1f}")
     print(f"✓ Total captures: {capture_count}")
-    
-    capL.release()
-    capR.release()
+    stop_preview(preview, mjpeg)
+    session.close()
     cv2.destroyAllWindows()
 
 
+def run_headless(replay=None, replay_fps=None, loop=True, disparity_mode=DISPARITY_MODE,
+                 upload_mode=UPLOAD_MODE, outbox_workers=OUTBOX_WORKERS,
+                 control_socket=CONTROL_SOCKET, stdin_control=False, trigger_dir=None,
+                 mjpeg_port=None, mjpeg_host=MJPEG_HOST, preview_scale=PREVIEW_SCALE, preview_fps=PREVIEW_FPS):
+    """Run the capture pipeline without a display, triggered from outside
+
+    There is no window or key handling. Captures come from the control
+    socket, stdin, a trigger directory or SIGUSR1 (see CaptureTriggers)
+    and use the newest finished depth frame; only that frame's depthImage
+    composite is rendered, on the capture worker. Views are rendered per
+    frame only for the MJPEG preview (`mjpeg_port`), and only while a
+    client is connected.
+    """
+    
+    def capture(job):
+        result = session.process_capture(job)
+        print(f"✓ Capture {job['timestamp']} ({job['source']}) signed and queued "
+              f"{(time.monotonic() - job['triggered']) * 1000:.0f} ms after the trigger")
+        return result
+    
+    session = DepthSession.open(replay, replay_fps, loop, disparity_mode, status=ConsoleStatus(),
+                                upload_mode=upload_mode, outbox_workers=outbox_workers, capture=capture)
+    if session is None:
+        return
+    min_disp, num_disp = session.min_disp, session.num_disp
+    pipeline, capture_worker, outbox = session.pipeline, session.capture_worker, session.outbox
+    
+    # Newest finished depth frame and counters, shared with the trigger threads
+    lock = threading.Lock()
+    state = {'frame': None, 'frames': 0, 'captures': 0, 'last_timestamp': 0}
+    fps_times = deque(maxlen=30)
+    stopping = threading.Event()
+    
+    def handle(command, source):
+        if command == 'quit':
+            stopping.set()
+            return "ok stopping"
+        if command == 'status':
+            with lock:
+                depth_fps = len(fps_times) / (sum(fps_times) + 1e-6) if fps_times else 0.0
+                return json.dumps({'frames': state['frames'], 'depth_fps': round(depth_fps, 1),
+                                   'captures': state['captures'], 'pending': capture_worker.pending,
+                                   'outbox': outbox.pending})
+        triggered = time.monotonic()
+        with lock:
+            frame = state['frame']
+            if frame is None:
+                return "error no depth frame yet"
+            # Unique per capture even when several are fired within a second
+            timestamp = max(int(time.time()), state['last_timestamp'] + 1)
+            state['last_timestamp'] = timestamp
+            job = dict(capture_job(frame, timestamp), source=source, triggered=triggered)
+            if not capture_worker.submit(job):
+                return "error capture backlog full"
+            state['captures'] += 1
+        print(f"✓ Capture {timestamp} triggered by {source} ({capture_worker.pending} pending)")
+        return f"ok {timestamp}"
+    
+    triggers = CaptureTriggers(handle)
+    triggers.install_signals()
+    if control_socket:
+        triggers.serve_socket(control_socket)
+    if stdin_control:
+        triggers.serve_stdin()
+    if trigger_dir:
+        triggers.watch_directory(trigger_dir)
+    
+    feeder = session.start_feeder()
+    
+    print("\n" + "="*70)
+    print("STEREO DEPTH SYSTEM - HEADLESS CAPTURE")
+    print("="*70)
+    print("Commands: capture | status | quit")
+    print(f"  kill -USR1 {os.getpid()}   capture")
+    print(f"  kill -TERM {os.getpid()}   stop")
+    print("="*70 + "\n")
+    
+    mjpeg = preview = None
+    if mjpeg_port:
+        mjpeg = MjpegServer(mjpeg_port, mjpeg_host).start()
+        preview = build_preview(min_disp, num_disp, preview_scale, preview_fps, mjpeg).start()
+    
+    last_output = time.time()
+    while not stopping.is_set():
+        triggers.poll_signals()
+        frame = pipeline.get(timeout=0.1)
+        if frame is None:
+            if not feeder.is_alive():
+                break  # replay finished and pipeline drained
+            continue
+        now = time.time()
+        with lock:
+            state['frame'] = frame
+            state['frames'] += 1
+            fps_times.append(now - last_output)
+            frame['depth_fps'] = len(fps_times) / (sum(fps_times) + 1e-6)
+        last_output = now
+        if mjpeg is not None and mjpeg.watched():
+            preview.submit(frame)
+        if preview is not None:
+            # Nothing is displayed headless: take the rendered frame so it counts as shown
+            preview.take()
+    
+    triggers.close()
+    stop_preview(preview, mjpeg)
+    print(f"\n✓ Depth frames: {state['frames']}")
+    print(f"✓ Total captures: {state['captures']}")
+    session.close()
+
+
 if __name__ == '__main__':
-    run_five_view()
+    parser = add_source_arguments(argparse.ArgumentParser(description="Stereo depth 5-view display with signed capture upload"))
+    parser.add_argument('--disparity-mode', choices=sorted(DISPARITY_MODES), default=DISPARITY_MODE,
+                        help="Disparity engine (default: %(default)s)")
+    parser.add_argument('--upload-mode', choices=UPLOAD_MODES, default=UPLOAD_MODE,
+                        help="Upload raw JPEGs as a streamed multipart body, or the base64 JSON payload")
+    parser.add_argument('--outbox-workers', type=int, default=OUTBOX_WORKERS,
+                        help="Concurrent uploads draining the outbox (default: %(default)s)")
+    parser.add_argument('--headless', action='store_true',
+                        help="No display: capture on control socket/stdin/trigger-dir commands or SIGUSR1")
+    parser.add_argument('--control-socket', default=CONTROL_SOCKET, metavar='PATH',
+                        help="Unix socket for --headless commands ('' to disable, default: %(default)s)")
+    parser.add_argument('--stdin-control', action='store_true',
+                        help="Also read --headless commands from stdin")
+    parser.add_argument('--trigger-dir', metavar='DIR',
+                        help="With --headless, every file dropped into DIR triggers a capture")
+    parser.add_argument('--preview-fps', type=float, default=PREVIEW_FPS,
+                        help="Preview refresh limit; depth and capture run at their own rate (default: %(default)s)")
+    parser.add_argument('--preview-scale', type=float, default=PREVIEW_SCALE,
+                        help="Preview size relative to the camera frames (default: %(default)s)")
+    parser.add_argument('--mjpeg-port', type=int, nargs='?', const=MJPEG_PORT, metavar='PORT',
+                        help=f"Stream the preview as MJPEG over HTTP (/left, /depth, /composite; default port {MJPEG_PORT})")
+    parser.add_argument('--mjpeg-host', default=MJPEG_HOST, metavar='HOST',
+                        help="Address the MJPEG server listens on; the stream is unauthenticated, "
+                             "use 0.0.0.0 only on a trusted network (default: %(default)s)")
+    args = parser.parse_args()
+    if args.headless:
+        run_headless(replay=args.replay, replay_fps=args.replay_fps, loop=not args.no_loop,
+                     disparity_mode=args.disparity_mode,
+                     upload_mode=args.upload_mode, outbox_workers=args.outbox_workers,
+                     control_socket=args.control_socket, stdin_control=args.stdin_control,
+                     trigger_dir=args.trigger_dir, mjpeg_port=args.mjpeg_port, mjpeg_host=args.mjpeg_host,
+                     preview_scale=args.preview_scale, preview_fps=args.preview_fps)
+    else:
+        run_five_view(replay=args.replay, replay_fps=args.replay_fps, loop=not args.no_loop,
+                      disparity_mode=args.disparity_mode,
+                      upload_mode=args.upload_mode, outbox_workers=args.outbox_workers,
+                      preview_scale=args.preview_scale, preview_fps=args.preview_fps,
+                      mjpeg_port=args.mjpeg_port, mjpeg_host=args.mjpeg_host)
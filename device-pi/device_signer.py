@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+
+from eth_account import Account
+from eth_keys import keys
+
+from manifest import manifest_message, sign_message_eip191
+
+# Placeholder signature used when the device has no key
+UNSIGNED = "UNSIGNED_NO_PRIVATE_KEY"
+
+
+def normalize_private_key(private_key):
+    """Private keys may be stored with or without the 0x prefix"""
+    private_key = private_key.strip()
+    return private_key if private_key.startswith('0x') else '0x' + private_key
+
+
+class DeviceSigner:
+    """The device key, loaded once at startup and reused for every capture
+
+    `sign(manifest)` returns the EIP-191 signature of one capture manifest
+    (see manifest.py) and `sign_many(manifests)` signs a batch, for example
+    the queued captures of the upload backlog. `on_sign(count, seconds)` is
+    called after every sign/sign_many call, so callers can log or
+    benchmark signing without wrapping it; running totals are kept in
+    `signed` and `sign_seconds`.
+    """
+
+    def __init__(self, private_key, on_sign=None):
+        # Derive the account (and its address) once instead of per capture
+        self.account = Account.from_key(normalize_private_key(private_key))
+        self.address = self.account.address
+        # Account.sign_message re-parses raw key bytes (and re-derives the
+        # public key) on every call; a PrivateKey object is used as is
+        self._key = keys.PrivateKey(self.account.key)
+        self.on_sign = on_sign
+        self.signed = 0
+        self.sign_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, var='PRIVATE_KEY', on_sign=None):
+        """Signer for the key in the environment (.env), or None if it is not set"""
+        private_key = os.getenv(var)
+        if not private_key:
+            print(f"⚠ WARNING: {var} not found in environment!")
+            print("  Captures will not be signed.")
+            return None
+        try:
+            signer = cls(private_key, on_sign=on_sign)
+        except (ValueError, TypeError) as e:
+            print(f"❌ Invalid {var}: {e}")
+            print("  Captures will not be signed.")
+            return None
+        print(f"✓ Device signer: {signer.address}")
+        return signer
+
+    def _record(self, count, elapsed):
+        with self._lock:
+            self.signed += count
+            self.sign_seconds += elapsed
+        if self.on_sign is not None:
+            self.on_sign(count, elapsed)
+
+    def sign(self, manifest):
+        """EIP-191 signature (0x hex) of one capture manifest"""
+        start = time.perf_counter()
+        signature = sign_message_eip191(manifest_message(manifest), self._key)
+        self._record(1, time.perf_counter() - start)
+        return signature
+
+    def sign_many(self, manifests):
+        """Signatures for a batch of manifests, in order"""
+        start = time.perf_counter()
+        signatures = [sign_message_eip191(manifest_message(m), self._key) for m in manifests]
+        self._record(len(signatures), time.perf_counter() - start)
+        return signatures
+
+    @property
+    def mean_sign_ms(self):
+        with self._lock:
+            return self.sign_seconds / self.signed * 1000 if self.signed else 0.0
@@ -0,0 +1,209 @@
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from stereo_grabber import StereoGrabber, StereoPair, configure_capture
+
+# Containers ReplaySource can read besides a directory of PNG/JPG pairs
+VIDEO_EXTENSIONS = ('.avi', '.mp4', '.mkv', '.mov')
+
+
+def open_camera_source(left_path, right_path, width, height, fps):
+    """Open both USB cameras and return a started StereoGrabber (None on failure)"""
+    capL = cv2.VideoCapture(left_path)
+    capR = cv2.VideoCapture(right_path)
+
+    for cap in [capL, capR]:
+        configure_capture(cap, width, height, fps)
+
+    if not capL.isOpened() or not capR.isOpened():
+        print("❌ Error: Cannot open cameras!")
+        capL.release()
+        capR.release()
+        return None
+
+    # One grab/decode thread per camera keeps the newest pair ready
+    grabber = StereoGrabber(capL, capR).start()
+    if not grabber.wait_ready():
+        print("❌ Error: Cameras opened but no frames received!")
+        grabber.release()
+        return None
+    return grabber
+
+
+def _load_directory(path):
+    lefts = sorted(glob.glob(os.path.join(path, 'left_*.png')) + glob.glob(os.path.join(path, 'left_*.jpg')))
+    rights = sorted(glob.glob(os.path.join(path, 'right_*.png')) + glob.glob(os.path.join(path, 'right_*.jpg')))
+    if len(lefts) != len(rights):
+        raise ValueError(f"Unmatched stereo pairs in {path}: {len(lefts)} left, {len(rights)} right")
+    return list(zip(lefts, rights))
+
+
+def _load_npz(path):
+    data = np.load(path)
+    if 'left' not in data or 'right' not in data:
+        raise ValueError(f"{path} must contain 'left' and 'right' frame arrays")
+    return list(zip(data['left'], data['right']))
+
+
+def _load_side_by_side_video(path):
+    """Read a recording where each frame is the left|right pair side by side"""
+    cap = cv2.VideoCapture(path)
+    pairs = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        half = frame.shape[1] // 2
+        pairs.append((frame[:, :half].copy(), frame[:, half:].copy()))
+    cap.release()
+    return pairs
+
+
+class ReplaySource:
+    """Recorded stereo pairs served through the StereoGrabber interface
+
+    Reads `left_*.png`/`right_*.png` pairs from a directory, a `.npz` with
+    `left`/`right` frame stacks, or a side-by-side video. With `fps` set,
+    frames advance on the wall clock like a live camera (a slow consumer
+    skips frames); with `fps=None` every pair is delivered as fast as the
+    consumer asks, which is what benchmarks want.
+    """
+
+    def __init__(self, path, fps=None, loop=True, size=None, preload=False):
+        self.path = path
+        self.fps = fps
+        self.loop = loop
+        self.size = size
+        self.failures = 0
+        self.exhausted = False
+
+        if os.path.isdir(path):
+            self._pairs = _load_directory(path)
+            self._lazy = True
+        elif path.endswith('.npz'):
+            self._pairs = _load_npz(path)
+            self._lazy = False
+        elif path.lower().endswith(VIDEO_EXTENSIONS):
+            self._pairs = _load_side_by_side_video(path)
+            self._lazy = False
+        else:
+            raise ValueError(f"Unsupported replay source: {path}")
+
+        if not self._pairs:
+            raise ValueError(f"No stereo pairs found in {path}")
+
+        self._cache_index = None
+        self._cache_pair = None
+        if preload or not self._lazy:
+            self._pairs = [self._decode(p) for p in self._pairs]
+            self._lazy = False
+
+        self._start_time = None
+        self._seq = 0
+
+    def __len__(self):
+        return len(self._pairs)
+
+    def _decode(self, entry):
+        if self._lazy or isinstance(entry[0], str):
+            left, right = cv2.imread(entry[0]), cv2.imread(entry[1])
+            if left is None or right is None:
+                raise ValueError(f"Cannot load stereo pair {entry}")
+        else:
+            left, right = entry
+        if self.size is not None and left.shape[1::-1] != tuple(self.size):
+            left = cv2.resize(left, tuple(self.size))
+            right = cv2.resize(right, tuple(self.size))
+        return left, right
+
+    def _pair_at(self, index):
+        if not self._lazy:
+            return self._pairs[index]
+        if index != self._cache_index:
+            self._cache_pair = self._decode(self._pairs[index])
+            self._cache_index = index
+        return self._cache_pair
+
+    def start(self):
+        self._start_time = time.monotonic()
+        self._seq = 0
+        self.exhausted = False
+        return self
+
+    def wait_ready(self, timeout=5.0):
+        return True
+
+    def stop(self):
+        pass
+
+    def release(self):
+        self._cache_pair = None
+
+    def _frame_number(self, after_seq, timeout):
+        """Sequence number (1-based) of the pair to deliver next"""
+        if self.fps is None:
+            return after_seq + 1 if after_seq is not None else max(self._seq, 1)
+
+        elapsed = time.monotonic() - self._start_time
+        seq = int(elapsed * self.fps) + 1
+        if after_seq is not None and seq <= after_seq:
+            # Sleep until the next frame is due, like waiting on a camera
+            wait = (after_seq / self.fps) - elapsed
+            if wait > timeout:
+                time.sleep(timeout)
+                return None
+            time.sleep(max(0.0, wait))
+            seq = after_seq + 1
+        return seq
+
+    def latest_pair(self, after_seq=None, timeout=1.0):
+        """Return the current StereoPair, or None when the recording has ended"""
+        if self._start_time is None:
+            self.start()
+        if self.exhausted:
+            return None
+
+        seq = self._frame_number(after_seq, timeout)
+        if seq is None:
+            return None
+        index = seq - 1
+        if index >= len(self._pairs):
+            if not self.loop:
+                self.exhausted = True
+                return None
+            index %= len(self._pairs)
+
+        left, right = self._pair_at(index)
+        self._seq = seq
+        now = time.monotonic()
+        return StereoPair(left, right, now, now, seq)
+
+
+def open_frame_source(replay=None, replay_fps=None, loop=True, left_path=None, right_path=None,
+                      width=640, height=480, fps=15):
+    """Open the live cameras, or a ReplaySource when `replay` is a path"""
+    if replay is None:
+        return open_camera_source(left_path, right_path, width, height, fps)
+    try:
+        source = ReplaySource(replay, fps=replay_fps, loop=loop, size=(width, height))
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        return None
+    print(f"✓ Replaying {len(source)} stereo pairs from {replay} "
+          f"({'unthrottled' if replay_fps is None else f'{replay_fps} FPS'})")
+    return source.start()
+
+
+def add_source_arguments(parser):
+    """Add the --replay options shared by the depth scripts"""
+    parser.add_argument('--replay', metavar='PATH',
+                        help="Replay stereo pairs from a directory, .npz or side-by-side video instead of the cameras")
+    parser.add_argument('--replay-fps', type=float, default=None,
+                        help="Replay rate in FPS (default: unthrottled)")
+    parser.add_argument('--no-loop', action='store_true',
+                        help="Stop at the end of the recording instead of looping")
+    return parser
@@ -0,0 +1,61 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+# --- CONFIGURATION ---
+ENCODER_WORKERS = 2
+
+JpegSettings = namedtuple('JpegSettings', ['quality', 'optimize', 'progressive'])
+# OpenCV's defaults, so output is unchanged unless a setting is overridden
+DEFAULT_SETTINGS = JpegSettings(quality=95, optimize=False, progressive=False)
+
+
+def encode_params(settings):
+    """cv2.imencode parameter list for JpegSettings"""
+    return [
+        cv2.IMWRITE_JPEG_QUALITY, int(settings.quality),
+        cv2.IMWRITE_JPEG_OPTIMIZE, int(settings.optimize),
+        cv2.IMWRITE_JPEG_PROGRESSIVE, int(settings.progressive),
+    ]
+
+
+def encode_jpeg(image, settings=DEFAULT_SETTINGS):
+    """Encode one image; returns the uint8 JPEG buffer"""
+    ok, buffer = cv2.imencode('.jpg', image, encode_params(settings))
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return buffer
+
+
+def write_jpeg(path, buffer):
+    """Write an already encoded JPEG buffer to disk (instead of encoding again with cv2.imwrite)"""
+    with open(path, 'wb') as f:
+        f.write(memoryview(buffer))
+
+
+class JpegEncoder:
+    """Thread pool that encodes the images of one capture in parallel
+
+    cv2.imencode releases the GIL, so the left image and the 5-view
+    composite encode on separate cores. `settings` maps an output name to
+    JpegSettings; names without an entry use DEFAULT_SETTINGS. Each image
+    is encoded once and the returned buffers are reused for the files on
+    disk and the upload payload.
+    """
+
+    def __init__(self, settings=None, workers=ENCODER_WORKERS):
+        self.settings = dict(settings or {})
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='jpeg')
+
+    def settings_for(self, name):
+        return self.settings.get(name, DEFAULT_SETTINGS)
+
+    def encode(self, images):
+        """{name: image} -> {name: JPEG buffer}, encoded concurrently"""
+        futures = {name: self.executor.submit(encode_jpeg, image, self.settings_for(name))
+                   for name, image in images.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    def close(self):
+        self.executor.shutdown(wait=True)
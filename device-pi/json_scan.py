@@ -0,0 +1,80 @@
+# Structural characters of JSON text, as str and as bytes (for bytes and mmap buffers)
+_STR_TOKENS = {c: c for c in '"\\[]{}'}
+_STR_TOKENS.update(whitespace=' \t\r\n', scalar_end=',}] \t\r\n')
+_BYTE_TOKENS = {name: token.encode('ascii') for name, token in _STR_TOKENS.items()}
+
+
+def _tokens(buf):
+    return _STR_TOKENS if isinstance(buf, str) else _BYTE_TOKENS
+
+
+def skip_whitespace(buf, pos):
+    """Index of the first non-whitespace character at or after `pos`"""
+    whitespace = _tokens(buf)['whitespace']
+    while pos < len(buf) and buf[pos:pos + 1] in whitespace:
+        pos += 1
+    return pos
+
+
+def string_end(buf, start):
+    """Index of the closing quote of the JSON string opening at buf[start]"""
+    quote, backslash = _tokens(buf)['"'], _tokens(buf)['\\']
+    end = buf.find(quote, start + 1)
+    while end >= 0:
+        backslashes = 0
+        while buf[end - 1 - backslashes:end - backslashes] == backslash:
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return end
+        end = buf.find(quote, end + 1)
+    raise ValueError("Unterminated JSON string")
+
+
+def flat_list_end(buf, start):
+    """Index past a list of plain numbers opening at buf[start], else None"""
+    tokens = _tokens(buf)
+    end = buf.find(tokens[']'], start)
+    if end < 0 or any(buf.find(tokens[c], start + 1, end) >= 0 for c in '"{['):
+        return None
+    return end + 1
+
+
+def value_end(buf, pos):
+    """Index just past the JSON value that starts at buf[pos]
+
+    Works on str, bytes and mmap buffers alike. Strings and plain number
+    lists are skipped with find, so a multi-MB base64 image or index list
+    costs a few C-level scans, and only the structural characters are
+    visited one at a time in Python.
+    """
+    tokens = _tokens(buf)
+    char = buf[pos:pos + 1]
+    if char == tokens['"']:
+        return string_end(buf, pos) + 1
+    if char not in (tokens['{'], tokens['[']):
+        end = pos
+        while end < len(buf) and buf[end:end + 1] not in tokens['scalar_end']:
+            end += 1
+        return end
+
+    depth = 0
+    while pos < len(buf):
+        char = buf[pos:pos + 1]
+        if char == tokens['"']:
+            pos = string_end(buf, pos)
+        elif char == tokens['[']:
+            list_end = flat_list_end(buf, pos)
+            if list_end is not None:
+                if depth == 0:
+                    return list_end
+                pos = list_end
+                continue
+            depth += 1
+        elif char == tokens['{']:
+            depth += 1
+        elif char in (tokens['}'], tokens[']']):
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        pos += 1
+    raise ValueError("Unterminated JSON value")
@@ -0,0 +1,91 @@
+import base64
+import json
+
+import numpy as np
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from Crypto.Hash import keccak as keccak_stream
+from eth_hash.auto import keccak
+
+# --- CONFIGURATION ---
+MANIFEST_SCHEME = 'keccak256-manifest'
+MANIFEST_VERSION = 1
+# Signed components of a capture's data object, in manifest order
+MANIFEST_COMPONENTS = ('timestamp', 'baseImage', 'depthImage', 'depthData')
+# Raw bytes are base64-encoded in chunks of this size (a multiple of 3) while hashing
+BASE64_CHUNK = 3 << 16
+
+
+def canonical_json(value):
+    """Deterministic JSON text (sorted keys, no whitespace), as the signatures use"""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'))
+
+
+def stream_digest(chunks):
+    """keccak256 of the concatenated chunks, hashed as they arrive"""
+    # eth_hash's incremental preimage keeps every part, pycryptodome's does not
+    digest = keccak_stream.new(digest_bits=256)
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.digest()
+
+
+def base64_digest(raw):
+    """keccak256 of base64(raw), without building the whole base64 string"""
+    view = memoryview(raw).cast('B')
+    return stream_digest(base64.b64encode(view[offset:offset + BASE64_CHUNK])
+                         for offset in range(0, len(view), BASE64_CHUNK))
+
+
+def component_digest(value):
+    """0x-prefixed keccak256 of one component
+
+    Strings (the base64 images) are hashed as their UTF-8 text, anything
+    else as canonical JSON, so a verifier can check an image straight from
+    the payload without re-serializing it. Raw image bytes (binary uploads),
+    including the uint8 array cv2.imencode returns, hash to the same digest
+    as their base64 text.
+    """
+    if isinstance(value, (bytes, bytearray, memoryview, np.ndarray)):
+        return '0x' + base64_digest(value).hex()
+    text = value if isinstance(value, str) else canonical_json(value)
+    return '0x' + keccak(text.encode('utf-8')).hex()
+
+
+def build_manifest(data_obj):
+    """Small manifest holding a digest of every signed component"""
+    return {
+        'scheme': MANIFEST_SCHEME,
+        'version': MANIFEST_VERSION,
+        'digests': {name: component_digest(data_obj[name]) for name in MANIFEST_COMPONENTS},
+    }
+
+
+def manifest_message(manifest):
+    """The constant-size text that is actually signed"""
+    return canonical_json(manifest)
+
+
+def sign_message_eip191(text, private_key):
+    """EIP-191 signature of a text message"""
+    signed_message = Account.sign_message(encode_defunct(text=text), private_key)
+    return signed_message.signature.hex()
+
+
+def sign_manifest(manifest, private_key):
+    """EIP-191 signature over the canonical manifest message"""
+    return sign_message_eip191(manifest_message(manifest), private_key)
+
+
+def recover_manifest_signer(manifest, signature):
+    """Address that signed the manifest"""
+    return Account.recover_message(encode_defunct(text=manifest_message(manifest)), signature=signature)
+
+
+def verify_components(data_obj, manifest, components=MANIFEST_COMPONENTS):
+    """Names of the components whose digest does not match the manifest"""
+    digests = manifest.get('digests', {})
+    return [
+        name for name in components
+        if name not in data_obj or digests.get(name) != component_digest(data_obj[name])
+    ]
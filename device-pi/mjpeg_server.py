@@ -0,0 +1,171 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from jpeg_encoder import JpegSettings, encode_jpeg
+
+# --- CONFIGURATION ---
+# The stream is unauthenticated: local only unless a host (e.g. 0.0.0.0) is given explicitly
+MJPEG_HOST = '127.0.0.1'
+MJPEG_PORT = 8080
+# A glance is enough: lower quality than captures keeps frames small on slow links
+MJPEG_SETTINGS = JpegSettings(quality=70, optimize=False, progressive=False)
+MJPEG_VIEWS = ('left', 'depth', 'composite')
+BOUNDARY = 'frame'
+# A client that cannot take a frame for this long is dropped (seconds)
+CLIENT_TIMEOUT = 5.0
+
+INDEX_PAGE = """<!doctype html>
+<html><head><title>i-witness preview</title></head>
+<body style="background:#111;color:#ddd;font-family:sans-serif">
+{views}
+</body></html>
+"""
+
+
+class MjpegHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = urlsplit(self.path).path.strip('/')
+        if path == '':
+            self._send_index()
+        elif path in MJPEG_VIEWS:
+            self._stream(path)
+        else:
+            self.send_error(404, f"Unknown view (expected {', '.join(MJPEG_VIEWS)})")
+
+    def _send_index(self):
+        views = '\n'.join(f'<h3>{view}</h3><img src="/{view}">' for view in MJPEG_VIEWS)
+        body = INDEX_PAGE.format(views=views).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, view):
+        server = self.server
+        self.connection.settimeout(CLIENT_TIMEOUT)
+        self.send_response(200)
+        self.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={BOUNDARY}')
+        self.send_header('Cache-Control', 'no-cache, no-store')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+
+        seq = server.join(view)
+        try:
+            while True:
+                frame = server.next_frame(view, seq)
+                if frame is None:
+                    break
+                server.count(skipped=frame[0] - seq - 1)
+                seq, jpeg = frame
+                self.wfile.write(f'--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n'
+                                 f'Content-Length: {len(jpeg)}\r\n\r\n'.encode('ascii'))
+                self.wfile.write(jpeg)
+                self.wfile.write(b'\r\n')
+                server.count(sent=1)
+        except OSError:
+            pass  # client went away or stalled past CLIENT_TIMEOUT
+        finally:
+            server.leave(view)
+
+
+class MjpegServer(ThreadingHTTPServer):
+    """HTTP MJPEG preview for remote monitoring of a field unit
+
+    Streams `/left`, `/depth` and `/composite` as multipart/x-mixed-replace
+    (open them in a browser, or `/` for all three). The producer calls
+    `publish(view, image)` with every preview frame; the frame is encoded
+    once, and only while someone watches that view, and every client of
+    the view is sent the same bytes.
+
+    Each client has its own thread that waits for the newest frame, so a
+    slow client only skips frames: `publish` never waits on a socket and
+    cannot back-pressure the capture loop. Clients that stall for
+    CLIENT_TIMEOUT are dropped. The stream has no authentication, so the
+    server listens on localhost unless another `host` is given.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port=MJPEG_PORT, host=MJPEG_HOST, settings=MJPEG_SETTINGS):
+        super().__init__((host, port), MjpegHandler)
+        self.settings = settings
+        self.running = False
+        self.thread = None
+        self._cond = threading.Condition()
+        # view -> (seq, JPEG bytes) of the newest frame
+        self._frames = {}
+        self._clients = {view: 0 for view in MJPEG_VIEWS}
+        self.encoded = 0
+        self.sent = 0
+        self.skipped = 0
+        self.served = 0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.serve_forever, name='mjpeg', daemon=True)
+        self.thread.start()
+        host, port = self.server_address[:2]
+        print(f"✓ MJPEG preview: http://{host}:{port}/ ({', '.join('/' + v for v in MJPEG_VIEWS)})")
+        return self
+
+    def stop(self):
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        self.shutdown()
+        self.server_close()
+
+    def watched(self, view=None):
+        """Whether anyone is streaming `view` (any view when None)"""
+        with self._cond:
+            if view is None:
+                return any(self._clients.values())
+            return self._clients[view] > 0
+
+    def publish(self, view, image):
+        """Offer the newest frame of a view; encoded only if someone is watching"""
+        if not self.watched(view):
+            return False
+        jpeg = encode_jpeg(image, self.settings).tobytes()
+        with self._cond:
+            seq = self._frames.get(view, (0, None))[0] + 1
+            self._frames[view] = (seq, jpeg)
+            self.encoded += 1
+            self._cond.notify_all()
+        return True
+
+    def join(self, view):
+        """Register a client; returns the seq to wait past (the next frame, not a stale one)"""
+        with self._cond:
+            self._clients[view] += 1
+            self.served += 1
+            return self._frames.get(view, (0, None))[0]
+
+    def count(self, sent=0, skipped=0):
+        """Add to the sent/skipped counters (called from every client thread)"""
+        with self._cond:
+            self.sent += sent
+            self.skipped += skipped
+
+    def leave(self, view):
+        with self._cond:
+            self._clients[view] -= 1
+
+    def next_frame(self, view, after_seq):
+        """(seq, JPEG bytes) of the first frame newer than `after_seq`, or None once stopped"""
+        with self._cond:
+            while self.running:
+                frame = self._frames.get(view)
+                if frame is not None and frame[0] > after_seq:
+                    return frame
+                self._cond.wait()
+            return None
+
+    def print_summary(self):
+        print(f"✓ MJPEG: {self.served} client(s) served, {self.encoded} frames encoded, "
+              f"{self.sent} sent, {self.skipped} skipped by slow clients")
@@ -0,0 +1,254 @@
+import json
+import os
+import shutil
+import threading
+import time
+import traceback
+import uuid
+
+# --- CONFIGURATION ---
+OUTBOX_DIR = 'outbox'
+OUTBOX_WORKERS = 1
+# Delay before a failed entry is retried: doubles per failure up to the max (seconds)
+RETRY_BASE = 30
+RETRY_MAX = 600
+
+# Files of one outbox entry
+META_FILE = 'meta.json'
+DEPTH_FILE = 'depthData.json'
+IMAGE_FILES = {'baseImage': 'baseImage.jpg', 'depthImage': 'depthImage.jpg'}
+
+
+class PermanentFailure(Exception):
+    """Raised by an outbox `send` when re-sending the entry cannot succeed"""
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_file(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class Outbox:
+    """Crash-safe on-disk queue of signed captures, drained by background workers
+
+    `add(payload)` writes the capture once into `<root>/.tmp-*` (raw JPEGs,
+    depthData, and the timestamp/manifest/signature), fsyncs it and renames
+    it into `<root>/pending/<id>`, so an entry is either complete or absent
+    after a crash or power loss. Pending entries are indexed oldest first
+    and picked up again on the next start.
+
+    `workers` threads call `send(payload)`, which returns
+    (success, result, piece_cid) like upload_to_server. A sent entry is
+    logged to `<root>/sent.jsonl` and removed; a failed one stays pending
+    and is retried after a per-entry backoff. An entry that can never be
+    sent (it fails to load, or `send` raises PermanentFailure) is moved to
+    `<root>/failed/<id>` and logged to `<root>/failed.jsonl` instead.
+    `on_result(entry_id, success, piece_cid, permanent)` is called after
+    every attempt.
+
+    Disk work (writes, fsyncs, removals and moves) never runs under the
+    queue lock, so `pending` stays cheap to read from the display loop.
+    """
+
+    def __init__(self, root=OUTBOX_DIR, send=None, workers=OUTBOX_WORKERS, on_result=None,
+                 retry_base=RETRY_BASE, retry_max=RETRY_MAX):
+        self.root = root
+        self.pending_dir = os.path.join(root, 'pending')
+        self.failed_dir = os.path.join(root, 'failed')
+        self.sent_log = os.path.join(root, 'sent.jsonl')
+        self.failed_log = os.path.join(root, 'failed.jsonl')
+        self.send = send
+        self.on_result = on_result
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        os.makedirs(self.pending_dir, exist_ok=True)
+        self._clear_partial_writes()
+
+        self._cond = threading.Condition()
+        self._log_lock = threading.Lock()
+        # id -> {'attempts': n, 'next_attempt': monotonic time}; ids sort by creation time
+        self._index = {entry_id: {'attempts': 0, 'next_attempt': 0.0}
+                       for entry_id in sorted(os.listdir(self.pending_dir))}
+        self._claimed = set()
+        self.sent = 0
+        self.failed_attempts = 0
+        self.failed = 0
+        self.running = False
+        self.threads = []
+        self.workers = workers
+        if self._index:
+            print(f"✓ Outbox: {len(self._index)} capture(s) pending from a previous run")
+
+    def _clear_partial_writes(self):
+        for name in os.listdir(self.root):
+            if name.startswith('.tmp-'):
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+    def __len__(self):
+        with self._cond:
+            return len(self._index)
+
+    @property
+    def pending(self):
+        return len(self)
+
+    def start(self):
+        """Start the drain workers (requires `send`); returns self"""
+        self.running = True
+        self.threads = [
+            threading.Thread(target=self._run, name=f'outbox-{n}', daemon=True)
+            for n in range(self.workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stop the workers; entries still pending stay on disk for the next run"""
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        for thread in self.threads:
+            thread.join(timeout)
+
+    def add(self, payload):
+        """Persist one signed capture and queue it for upload; returns its entry id"""
+        data = payload['data']
+        entry_id = f"{data['timestamp']:012d}-{uuid.uuid4().hex[:8]}"
+        tmp_dir = os.path.join(self.root, f'.tmp-{entry_id}')
+        os.makedirs(tmp_dir)
+
+        meta = {
+            'timestamp': data['timestamp'],
+            'manifest': payload.get('manifest'),
+            'signature': payload.get('signature', ''),
+        }
+        _write_file(os.path.join(tmp_dir, META_FILE), json.dumps(meta).encode('utf-8'))
+        _write_file(os.path.join(tmp_dir, DEPTH_FILE), json.dumps(data['depthData']).encode('utf-8'))
+        for name, filename in IMAGE_FILES.items():
+            _write_file(os.path.join(tmp_dir, filename), data[name])
+        _fsync_dir(tmp_dir)
+
+        # The rename is the commit point
+        os.rename(tmp_dir, os.path.join(self.pending_dir, entry_id))
+        _fsync_dir(self.pending_dir)
+
+        with self._cond:
+            self._index[entry_id] = {'attempts': 0, 'next_attempt': 0.0}
+            self._cond.notify()
+        return entry_id
+
+    def load(self, entry_id):
+        """Binary payload (raw JPEG bytes) of a pending entry"""
+        entry_dir = os.path.join(self.pending_dir, entry_id)
+        with open(os.path.join(entry_dir, META_FILE)) as f:
+            meta = json.load(f)
+        with open(os.path.join(entry_dir, DEPTH_FILE)) as f:
+            depth_data = json.load(f)
+        data = {'timestamp': meta['timestamp'], 'depthData': depth_data}
+        for name, filename in IMAGE_FILES.items():
+            with open(os.path.join(entry_dir, filename), 'rb') as f:
+                data[name] = f.read()
+        return {'data': data, 'manifest': meta['manifest'], 'signature': meta['signature']}
+
+    def _claim(self):
+        """Oldest entry that is due, waiting until one is; None once stopped"""
+        with self._cond:
+            while self.running:
+                now = time.monotonic()
+                due = [entry_id for entry_id, state in self._index.items()
+                       if entry_id not in self._claimed and state['next_attempt'] <= now]
+                if due:
+                    entry_id = min(due)
+                    self._claimed.add(entry_id)
+                    return entry_id
+                waiting = [state['next_attempt'] for entry_id, state in self._index.items()
+                           if entry_id not in self._claimed]
+                self._cond.wait(timeout=min(waiting) - now if waiting else None)
+            return None
+
+    def _append_log(self, path, record):
+        # The log lock only orders appends between workers; readers of the queue never take it
+        with self._log_lock:
+            with open(path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _mark_sent(self, entry_id, piece_cid):
+        # Disk work first and outside self._cond, so `pending` never waits on an fsync
+        self._append_log(self.sent_log, {'id': entry_id, 'pieceCid': piece_cid, 'sentAt': int(time.time())})
+        shutil.rmtree(os.path.join(self.pending_dir, entry_id), ignore_errors=True)
+        with self._cond:
+            del self._index[entry_id]
+            self.sent += 1
+
+    def _mark_permanent(self, entry_id, reason):
+        record = {'id': entry_id, 'reason': reason, 'failedAt': int(time.time())}
+        os.makedirs(self.failed_dir, exist_ok=True)
+        try:
+            os.rename(os.path.join(self.pending_dir, entry_id), os.path.join(self.failed_dir, entry_id))
+            _fsync_dir(self.failed_dir)
+            _fsync_dir(self.pending_dir)
+        except OSError as e:
+            record['reason'] += f" (not moved: {e})"
+        self._append_log(self.failed_log, record)
+        with self._cond:
+            del self._index[entry_id]
+            self.failed += 1
+        print(f"❌ Outbox: {entry_id} will not be retried ({reason}), moved to {self.failed_dir}")
+
+    def _mark_failed(self, entry_id):
+        with self._cond:
+            state = self._index[entry_id]
+            state['attempts'] += 1
+            delay = min(self.retry_max, self.retry_base * 2 ** (state['attempts'] - 1))
+            state['next_attempt'] = time.monotonic() + delay
+            self.failed_attempts += 1
+        print(f"⚠ Outbox: {entry_id} not uploaded (attempt {state['attempts']}), retrying in {delay:.0f}s")
+
+    def _run(self):
+        while True:
+            entry_id = self._claim()
+            if entry_id is None:
+                return
+            success, piece_cid, reason = False, None, None
+            try:
+                payload = self.load(entry_id)
+            except Exception as e:
+                # A malformed entry stays malformed: retrying cannot fix the files
+                payload, reason = None, f"unreadable entry: {e!r}"
+            if payload is not None:
+                try:
+                    success, _, piece_cid = self.send(payload)
+                except PermanentFailure as e:
+                    reason = str(e)
+                except Exception as e:
+                    print(f"❌ Outbox: upload of {entry_id} failed: {e}")
+                    traceback.print_exc()
+            if success:
+                self._mark_sent(entry_id, piece_cid)
+            elif reason is not None:
+                self._mark_permanent(entry_id, reason)
+            else:
+                self._mark_failed(entry_id)
+            with self._cond:
+                self._claimed.discard(entry_id)
+                self._cond.notify_all()
+            if self.on_result is not None:
+                self.on_result(entry_id, success, piece_cid, reason is not None)
@@ -0,0 +1,229 @@
+import queue
+import threading
+import time
+import traceback
+
+# --- FRAME-DROP POLICIES ---
+# What a producer does when the next stage's queue is full
+DROP_BLOCK = 'block'          # wait for room (back-pressure upstream)
+DROP_OLDEST = 'drop_oldest'   # evict the oldest queued frame (live view)
+DROP_NEWEST = 'drop_newest'   # discard the incoming frame
+DROP_POLICIES = (DROP_BLOCK, DROP_OLDEST, DROP_NEWEST)
+
+
+class Stage:
+    """One step of the frame pipeline
+
+    `fn(item)` receives the frame dict from the previous stage and returns
+    the (usually same) dict for the next one, or None to drop the frame.
+    If `init` is given, each worker calls it once and `fn(item, state)` is
+    used instead, for objects that must not be shared between threads
+    (e.g. a StereoSGBM matcher). A state with a close() method (e.g. a
+    striped disparity engine and its thread pool) is closed when the
+    worker stops.
+    """
+
+    def __init__(self, name, fn, workers=1, maxsize=2, drop=DROP_OLDEST, init=None):
+        if drop not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy '{drop}', expected one of {DROP_POLICIES}")
+        if workers < 1:
+            raise ValueError("A stage needs at least one worker")
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.maxsize = maxsize
+        self.drop = drop
+        self.init = init
+
+
+class _StageStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.busy_time = 0.0
+
+    def record(self, elapsed):
+        with self.lock:
+            self.processed += 1
+            self.busy_time += elapsed
+
+    def add(self, field):
+        with self.lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+
+class Pipeline:
+    """Multi-stage frame processor with bounded queues between stages
+
+    Each stage runs on its own worker threads (OpenCV releases the GIL in
+    remap/SGBM/colormap calls, so threads spread across cores). Every stage
+    reads from a bounded input queue, so throughput is set by the slowest
+    stage and a stalled consumer sheds frames instead of growing memory.
+    Results come out of `get()` in frame order; a frame that finishes after
+    a newer one was already returned is dropped as stale.
+    """
+
+    def __init__(self, stages, output_size=2, output_drop=DROP_OLDEST):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        if output_drop not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy '{output_drop}', expected one of {DROP_POLICIES}")
+        self.stages = list(stages)
+        self.output_drop = output_drop
+        # queues[i] feeds stage i, queues[-1] is the output queue
+        self.queues = [queue.Queue(maxsize=s.maxsize) for s in self.stages]
+        self.queues.append(queue.Queue(maxsize=output_size))
+        self.stats = {s.name: _StageStats() for s in self.stages}
+        self.output_stats = _StageStats()
+        self.threads = []
+        self.running = False
+        self._seq = 0
+        self._seq_lock = threading.Lock()
+        self._last_out = -1
+
+    # --- lifecycle ---
+
+    def start(self):
+        self.running = True
+        for index, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker, args=(index, stage),
+                    name=f'{stage.name}-{n}', daemon=True
+                )
+                thread.start()
+                self.threads.append(thread)
+        return self
+
+    def stop(self, timeout=1.0):
+        self.running = False
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- data flow ---
+
+    def _put(self, q, entry, policy, stats):
+        """Put into a bounded queue honouring the drop policy"""
+        if policy == DROP_BLOCK:
+            while self.running:
+                try:
+                    q.put(entry, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        if policy == DROP_NEWEST:
+            try:
+                q.put_nowait(entry)
+                return True
+            except queue.Full:
+                stats.add('dropped')
+                return False
+
+        # DROP_OLDEST: make room by evicting the head of the queue
+        while True:
+            try:
+                q.put_nowait(entry)
+                return True
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                    stats.add('dropped')
+                except queue.Empty:
+                    pass
+
+    def submit(self, item):
+        """Feed a frame dict into the first stage; returns False if it was dropped"""
+        with self._seq_lock:
+            self._seq += 1
+            seq = self._seq
+        first = self.stages[0]
+        return self._put(self.queues[0], (seq, item), first.drop, self.stats[first.name])
+
+    def _worker(self, index, stage):
+        stats = self.stats[stage.name]
+        state = stage.init() if stage.init is not None else None
+        in_q = self.queues[index]
+        out_q = self.queues[index + 1]
+        if index + 1 < len(self.stages):
+            next_stage = self.stages[index + 1]
+            out_policy, out_stats = next_stage.drop, self.stats[next_stage.name]
+        else:
+            out_policy, out_stats = self.output_drop, self.output_stats
+
+        while self.running:
+            try:
+                seq, item = in_q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            start = time.perf_counter()
+            try:
+                result = stage.fn(item, state) if stage.init is not None else stage.fn(item)
+            except Exception as e:
+                stats.add('errors')
+                print(f"⚠ Pipeline stage '{stage.name}' failed: {e}")
+                traceback.print_exc()
+                continue
+            stats.record(time.perf_counter() - start)
+
+            if result is not None:
+                self._put(out_q, (seq, result), out_policy, out_stats)
+
+        if hasattr(state, 'close'):
+            state.close()
+
+    def get(self, timeout=None):
+        """Return the next finished frame dict, or None on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                seq, item = self.queues[-1].get(timeout=remaining)
+            except queue.Empty:
+                return None
+            if seq > self._last_out:
+                self._last_out = seq
+                return item
+            # Overtaken by a newer frame from a parallel worker
+            self.output_stats.add('dropped')
+
+    def summary(self):
+        """Per-stage counters: processed, dropped, errors, mean ms, queue depth"""
+        result = {}
+        for stage, q in zip(self.stages, self.queues):
+            stats = self.stats[stage.name]
+            with stats.lock:
+                mean_ms = stats.busy_time / stats.processed * 1000 if stats.processed else 0.0
+                result[stage.name] = {
+                    'workers': stage.workers,
+                    'processed': stats.processed,
+                    'dropped': stats.dropped,
+                    'errors': stats.errors,
+                    'mean_ms': mean_ms,
+                    'queued': q.qsize(),
+                }
+        result['output'] = {'dropped': self.output_stats.dropped, 'queued': self.queues[-1].qsize()}
+        return result
+
+    def print_summary(self):
+        print("\n" + "="*70)
+        print("PIPELINE STAGE SUMMARY")
+        print("="*70)
+        for name, s in self.summary().items():
+            if name == 'output':
+                print(f"{'output':<12} dropped={s['dropped']}")
+                continue
+            print(f"{name:<12} workers={s['workers']}  processed={s['processed']:<6} "
+                  f"dropped={s['dropped']:<5} errors={s['errors']:<3} mean={s['mean_ms']:.1f} ms")
+        print("="*70 + "\n")
@@ -0,0 +1,119 @@
+import threading
+import time
+import traceback
+
+# --- CONFIGURATION ---
+PREVIEW_FPS = 10
+# Preview size relative to the camera frames (like the 0.5 shrink in depthmap/depthmap2.py)
+PREVIEW_SCALE = 0.5
+# Render targets: one shown, one published, one being drawn
+PREVIEW_BUFFERS = 3
+
+
+class PreviewRenderer:
+    """Live preview rendered on its own thread, decoupled from the depth pipeline
+
+    The depth loop calls `submit(frame)` for every finished frame; that only
+    replaces the waiting frame, so it never blocks and a renderer that
+    falls behind skips frames instead of slowing disparity or capture.
+    The thread renders the newest frame at most `fps` times a second by
+    calling `render(frame, target)` on one of `buffers` targets built by
+    `make_target()`. The display loop picks up finished targets with
+    `take()`; a taken target is not drawn into again until the next take,
+    so it can be shown (and drawn on) without tearing.
+    """
+
+    def __init__(self, render, make_target, fps=PREVIEW_FPS, buffers=PREVIEW_BUFFERS):
+        self.render = render
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.targets = [make_target() for _ in range(buffers)]
+        self._cond = threading.Condition()
+        self._frame = None
+        self._published = None
+        self._shown = None
+        self.running = False
+        self.thread = None
+        self.submitted = 0
+        self.rendered = 0
+        self.skipped = 0
+        self.busy_time = 0.0
+        self._render_times = []
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='preview', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def submit(self, frame):
+        """Offer the newest frame; an older one still waiting is skipped"""
+        with self._cond:
+            if self._frame is not None:
+                self.skipped += 1
+            self._frame = frame
+            self.submitted += 1
+            self._cond.notify()
+
+    def take(self):
+        """Newest rendered target not yet taken, or None"""
+        with self._cond:
+            if self._published is None:
+                return None
+            self._shown, self._published = self._published, None
+            return self.targets[self._shown]
+
+    @property
+    def fps(self):
+        """Preview frames rendered per second, over the last few"""
+        with self._cond:
+            times = self._render_times
+            if len(times) < 2:
+                return 0.0
+            return (len(times) - 1) / max(times[-1] - times[0], 1e-6)
+
+    def _run(self):
+        next_due = 0.0
+        while True:
+            with self._cond:
+                while self.running and self._frame is None:
+                    self._cond.wait()
+                if not self.running:
+                    return
+            # Hold to the target rate; frames arriving meanwhile replace the waiting one
+            delay = next_due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            with self._cond:
+                frame, self._frame = self._frame, None
+                busy = {self._published, self._shown}
+                index = next(i for i in range(len(self.targets)) if i not in busy)
+            if frame is None:
+                continue
+
+            start = time.monotonic()
+            next_due = start + self.interval
+            try:
+                self.render(frame, self.targets[index])
+            except Exception as e:
+                print(f"⚠ Preview render failed: {e}")
+                traceback.print_exc()
+                continue
+            with self._cond:
+                if self._published is not None:
+                    self.skipped += 1
+                self._published = index
+                self.rendered += 1
+                self.busy_time += time.monotonic() - start
+                self._render_times = (self._render_times + [start])[-10:]
+
+    def print_summary(self):
+        mean_ms = self.busy_time / self.rendered * 1000 if self.rendered else 0.0
+        print(f"✓ Preview: {self.rendered} of {self.submitted} frames rendered "
+              f"({self.skipped} skipped), mean {mean_ms:.1f} ms")
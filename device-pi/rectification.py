@@ -0,0 +1,94 @@
+import hashlib
+import os
+
+import cv2
+import numpy as np
+
+from stereo_depth import intersect_roi
+
+MAP_KEYS = ('mapL1', 'mapL2', 'mapR1', 'mapR2')
+
+
+def fixed_map_cache_path(param_file):
+    """Cache file for converted maps, stored next to the calibration file"""
+    root, _ = os.path.splitext(param_file)
+    return f'{root}.fixed.npz'
+
+
+def file_hash(path):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_float_map(map1):
+    """True for CV_32FC1 x/y map pairs (calicali.py) or a single CV_32FC2 map"""
+    return map1.dtype == np.float32
+
+
+def to_fixed_point(map1, map2):
+    """Convert float rectification maps to the CV_16SC2 format cv2.remap is fastest with"""
+    if not is_float_map(map1):
+        return map1, map2
+    if map1.ndim == 3 and map1.shape[2] == 2:
+        map2 = None
+    return cv2.convertMaps(map1, map2, cv2.CV_16SC2)
+
+
+def _load_cache(cache_file, source_hash):
+    try:
+        cached = np.load(cache_file)
+    except (OSError, ValueError):
+        return None
+    if 'source_hash' not in cached or str(cached['source_hash']) != source_hash:
+        return None
+    return tuple(cached[key] for key in MAP_KEYS)
+
+
+def _save_cache(cache_file, maps, source_hash):
+    tmp_file = cache_file + '.tmp.npz'
+    try:
+        np.savez(tmp_file, source_hash=source_hash, **dict(zip(MAP_KEYS, maps)))
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"⚠ Could not cache fixed-point maps to {cache_file}: {e}")
+
+
+def load_rectification_maps(param_file):
+    """Load (mapL1, mapL2, mapR1, mapR2) as fixed-point maps
+
+    Float maps from calicali.py are converted once with cv2.convertMaps and
+    cached in `<param_file>.fixed.npz`, keyed by a hash of the calibration
+    file so a recalibration invalidates the cache. Maps that are already
+    CV_16SC2 (calibratenew.py) are returned unchanged.
+    """
+    data = np.load(param_file)
+    maps = tuple(data[key] for key in MAP_KEYS)
+    if not is_float_map(maps[0]):
+        return maps
+
+    source_hash = file_hash(param_file)
+    cache_file = fixed_map_cache_path(param_file)
+    cached = _load_cache(cache_file, source_hash)
+    if cached is not None:
+        print(f"✓ Using cached fixed-point maps: {cache_file}")
+        return cached
+
+    print("Converting float rectification maps to fixed-point...")
+    mapL1, mapL2 = to_fixed_point(maps[0], maps[1])
+    mapR1, mapR2 = to_fixed_point(maps[2], maps[3])
+    fixed = (mapL1, mapL2, mapR1, mapR2)
+    _save_cache(cache_file, fixed, source_hash)
+    print(f"✓ Fixed-point maps cached to {cache_file}")
+    return fixed
+
+
+def load_valid_roi(param_file):
+    """Intersection of roi_left/roi_right from calicali.py, or None if not saved"""
+    data = np.load(param_file)
+    if 'roi_left' not in data or 'roi_right' not in data:
+        return None
+    return intersect_roi(tuple(data['roi_left']), tuple(data['roi_right']))
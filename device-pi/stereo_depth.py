@@ -0,0 +1,381 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+# --- DEFAULT MATCHER SETTINGS (shared by all disparity modes) ---
+MIN_DISP = 0
+NUM_DISP = 96
+WINDOW_SIZE = 9
+
+# Extra pixels matched around a cropped region, beyond the search range on
+# either side. SGBM path aggregation and the speckle filter reach well beyond
+# one block; with 64 px a rectification-sized ROI matches the full-frame
+# result exactly on the calibration set. Small ROIs far from the borders can
+# still differ (speckle regions have no size bound), so a crop is a close
+# approximation, not a guarantee.
+CROP_MARGIN = 64
+
+# 'striped' engine: up to STRIPED_BANDS horizontal bands (one per CPU core)
+# matched in parallel, each with half a block plus STRIPED_MARGIN extra rows
+# above and below, so a band costs little more than its own rows. SGBM
+# aggregation carries across whole columns, so bands only approximate the
+# single call (about 80% of valid pixels within 1 px at 4 bands on the
+# calibration pairs; wider overlaps buy a few percent for twice the work).
+# Opt-in: only worth it where benchmark.py shows disparity_striped beating
+# compute_stereo_depth on the device's cores.
+STRIPED_BANDS = 4
+STRIPED_MARGIN = 4
+# Matchers compute_stereo_depth_striped keeps a striped engine for
+STRIPED_CACHE_SIZE = 4
+
+# 'temporal' engine: tiles of a (columns, rows) grid whose mean absolute
+# change in the rectified left image exceeds TEMPORAL_THRESHOLD grey levels
+# are re-matched; the rest keep last frame's disparity. Every
+# TEMPORAL_REFRESH frames, or when more than TEMPORAL_FULL_FRACTION of the
+# tiles changed, the whole frame is matched again.
+TEMPORAL_TILES = (8, 6)
+TEMPORAL_THRESHOLD = 6.0
+TEMPORAL_REFRESH = 30
+TEMPORAL_FULL_FRACTION = 0.5
+
+
+def create_stereo_matcher(min_disp=MIN_DISP, num_disp=NUM_DISP, window_size=WINDOW_SIZE, channels=3):
+    """Create the SGBM matcher used for live depth
+
+    P1/P2 scale with the channel count because SGBM sums matching cost over
+    channels; a grayscale matcher needs channels=1 to keep the same smoothness.
+    """
+    return cv2.StereoSGBM_create(
+        minDisparity=min_disp,
+        numDisparities=num_disp,
+        blockSize=window_size,
+        P1=8 * channels * window_size**2,
+        P2=32 * channels * window_size**2,
+        disp12MaxDiff=1,
+        uniquenessRatio=10,
+        speckleWindowSize=100,
+        speckleRange=32,
+        preFilterCap=63,
+        mode=cv2.STEREO_SGBM_MODE_SGBM_3WAY
+    )
+
+
+def clone_matcher(stereo):
+    """New StereoSGBM with the same settings (matchers must not be shared across threads)"""
+    return cv2.StereoSGBM_create(
+        minDisparity=stereo.getMinDisparity(),
+        numDisparities=stereo.getNumDisparities(),
+        blockSize=stereo.getBlockSize(),
+        P1=stereo.getP1(),
+        P2=stereo.getP2(),
+        disp12MaxDiff=stereo.getDisp12MaxDiff(),
+        uniquenessRatio=stereo.getUniquenessRatio(),
+        speckleWindowSize=stereo.getSpeckleWindowSize(),
+        speckleRange=stereo.getSpeckleRange(),
+        preFilterCap=stereo.getPreFilterCap(),
+        mode=stereo.getMode()
+    )
+
+
+def disparity_agreement(reference, candidate, tolerance=1.0):
+    """Accuracy of a disparity map against a reference (e.g. the full search)
+
+    Returns the fraction of reference-valid pixels the candidate reproduces
+    within `tolerance` px, the mean absolute error where both are valid, and
+    the valid coverage of each map.
+    """
+    ref_valid = reference > 0
+    cand_valid = candidate > 0
+    both = ref_valid & cand_valid
+    diff = np.abs(reference[both] - candidate[both])
+    ref_count = int(ref_valid.sum())
+    return {
+        'agreement': float((diff <= tolerance).sum() / ref_count) if ref_count else 0.0,
+        'mean_abs_error': float(diff.mean()) if diff.size else 0.0,
+        'reference_coverage': float(ref_valid.mean()),
+        'coverage': float(cand_valid.mean()),
+    }
+
+
+def to_gray(img):
+    return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+
+
+def intersect_roi(roi_left, roi_right):
+    """Intersection of two (x, y, w, h) rectangles, or None if they do not overlap"""
+    if roi_left is None or roi_right is None:
+        return None
+    x0 = max(roi_left[0], roi_right[0])
+    y0 = max(roi_left[1], roi_right[1])
+    x1 = min(roi_left[0] + roi_left[2], roi_right[0] + roi_right[2])
+    y1 = min(roi_left[1] + roi_left[3], roi_right[1] + roi_right[3])
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return (int(x0), int(y0), int(x1 - x0), int(y1 - y0))
+
+
+def matching_window(roi, shape, min_disp, num_disp, window_size, margin=CROP_MARGIN):
+    """Crop rectangle around a ROI with the margins SGBM needs to match it
+
+    Both sides also cover the disparity search range: on the left because
+    SGBM leaves the first min_disp + num_disp columns invalid, on the right
+    because the left-right consistency check (disp12MaxDiff) matches right
+    image pixels against left columns up to that far to their right. So
+    pixels inside the ROI see the same candidates and aggregation paths as
+    in a full-frame match.
+    """
+    height, width = shape[:2]
+    x, y, w, h = roi
+    pad = max(window_size // 2 + 1, margin)
+    x0 = max(0, x - (min_disp + num_disp) - pad)
+    y0 = max(0, y - pad)
+    x1 = min(width, x + w + (min_disp + num_disp) + pad)
+    y1 = min(height, y + h + pad)
+    return x0, y0, x1, y1
+
+
+class SGBMEngine:
+    """Single full-frame SGBM call on the BGR rectified pair (the original path)"""
+
+    def __init__(self, min_disp=MIN_DISP, num_disp=NUM_DISP, window_size=WINDOW_SIZE, **_):
+        self.min_disp = min_disp
+        self.num_disp = num_disp
+        self.window_size = window_size
+        self.stereo = create_stereo_matcher(min_disp, num_disp, window_size)
+
+    def compute(self, imgL, imgR):
+        return self.stereo.compute(imgL, imgR).astype(np.float32) / 16.0
+
+
+class RoiSGBMEngine:
+    """Grayscale SGBM restricted to the valid rectification ROI
+
+    Matches only the intersection of `roi_left`/`roi_right` (plus the margins
+    SGBM needs) on single-channel images, then pastes the result into a
+    full-size map whose border is marked invalid.
+    """
+
+    def __init__(self, min_disp=MIN_DISP, num_disp=NUM_DISP, window_size=WINDOW_SIZE, roi=None, **_):
+        self.min_disp = min_disp
+        self.num_disp = num_disp
+        self.window_size = window_size
+        self.roi = roi
+        self.invalid = float(min_disp - 1)
+        self.stereo = create_stereo_matcher(min_disp, num_disp, window_size, channels=1)
+
+    def compute(self, imgL, imgR):
+        grayL, grayR = to_gray(imgL), to_gray(imgR)
+        if self.roi is None:
+            return self.stereo.compute(grayL, grayR).astype(np.float32) / 16.0
+
+        x0, y0, x1, y1 = matching_window(self.roi, grayL.shape, self.min_disp, self.num_disp, self.window_size)
+        raw = self.stereo.compute(grayL[y0:y1, x0:x1], grayR[y0:y1, x0:x1])
+
+        x, y, w, h = self.roi
+        disparity = np.full(grayL.shape[:2], self.invalid, dtype=np.float32)
+        disparity[y:y + h, x:x + w] = raw[y - y0:y - y0 + h, x - x0:x - x0 + w]
+        disparity[y:y + h, x:x + w] /= 16.0
+        return disparity
+
+
+class StripedSGBMEngine:
+    """Full-frame SGBM split into overlapping horizontal bands matched in parallel
+
+    Each band is extended by `overlap` rows above and below (by default half
+    a block plus STRIPED_MARGIN) so the rows it keeps have their full
+    matching window, and each band has its own matcher on a thread pool.
+    `bands` defaults to one per CPU core, at most STRIPED_BANDS; on a single
+    core that is one band, the plain full-frame call. The kept rows are
+    written straight into one output map. Close the engine to stop its
+    threads.
+    """
+
+    def __init__(self, min_disp=MIN_DISP, num_disp=NUM_DISP, window_size=WINDOW_SIZE,
+                 bands=None, overlap=None, matcher=None, **_):
+        if matcher is not None:
+            window_size = matcher.getBlockSize()
+        self.bands = bands or min(STRIPED_BANDS, os.cpu_count() or 1)
+        if overlap is None:
+            overlap = window_size // 2 + STRIPED_MARGIN
+        self.overlap = max(overlap, window_size // 2 + 1)
+        if matcher is not None:
+            self.matchers = [clone_matcher(matcher) for _ in range(self.bands)]
+        else:
+            self.matchers = [create_stereo_matcher(min_disp, num_disp, window_size) for _ in range(self.bands)]
+        self.pool = ThreadPoolExecutor(max_workers=self.bands, thread_name_prefix='sgbm-band')
+
+    def compute(self, imgL, imgR):
+        height = imgL.shape[0]
+        rows = np.linspace(0, height, self.bands + 1).astype(int)
+        disparity = np.empty(imgL.shape[:2], dtype=np.float32)
+
+        def match_band(index):
+            top, bottom = rows[index], rows[index + 1]
+            top_pad = max(0, top - self.overlap)
+            bottom_pad = min(height, bottom + self.overlap)
+            raw = self.matchers[index].compute(imgL[top_pad:bottom_pad], imgR[top_pad:bottom_pad])
+            band = disparity[top:bottom]
+            band[:] = raw[top - top_pad:bottom - top_pad]
+            band /= 16.0
+
+        list(self.pool.map(match_band, range(self.bands)))
+        return disparity
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+
+
+class TemporalSGBMEngine:
+    """SGBM that only re-matches the tiles that changed since they were last matched
+
+    Change detection is a per-tile mean of |left - reference| on the
+    grayscale rectified left image, where the reference holds each tile as
+    it looked when its disparity was computed (so slow drift still adds up
+    and triggers a re-match). Changed tiles in a row are merged into runs
+    and matched as one crop with the search-range margin on the left;
+    static tiles carry their previous disparity forward. A full match every
+    `refresh` frames bounds any remaining drift.
+
+    Keeps state between calls, so each pipeline worker needs its own engine
+    and a single disparity worker gets the most reuse.
+    """
+
+    def __init__(self, min_disp=MIN_DISP, num_disp=NUM_DISP, window_size=WINDOW_SIZE,
+                 tiles=TEMPORAL_TILES, threshold=TEMPORAL_THRESHOLD, refresh=TEMPORAL_REFRESH,
+                 full_fraction=TEMPORAL_FULL_FRACTION, **_):
+        self.min_disp = min_disp
+        self.num_disp = num_disp
+        self.window_size = window_size
+        self.tiles = tiles
+        self.threshold = threshold
+        self.refresh = refresh
+        self.full_fraction = full_fraction
+        self.stereo = create_stereo_matcher(min_disp, num_disp, window_size)
+        self.reset()
+
+    def reset(self):
+        """Drop the carried-over state; the next frame is matched in full"""
+        self.disparity = None
+        self.reference = None
+        self.frames_since_refresh = 0
+        # Fraction of tiles matched on the last frame (1.0 for a full match)
+        self.last_changed_fraction = 1.0
+
+    def _changed_tiles(self, gray):
+        diff = cv2.absdiff(gray, self.reference)
+        # INTER_AREA averages each tile in one pass
+        return cv2.resize(diff, self.tiles, interpolation=cv2.INTER_AREA).astype(np.float32) > self.threshold
+
+    def _full_match(self, imgL, imgR, gray):
+        self.disparity = self.stereo.compute(imgL, imgR).astype(np.float32) / 16.0
+        self.reference = gray.copy()
+        self.frames_since_refresh = 0
+        self.last_changed_fraction = 1.0
+        return self.disparity.copy()
+
+    def compute(self, imgL, imgR):
+        gray = to_gray(imgL)
+        if (self.disparity is None or self.disparity.shape != gray.shape
+                or self.frames_since_refresh + 1 >= self.refresh):
+            return self._full_match(imgL, imgR, gray)
+
+        changed = self._changed_tiles(gray)
+        self.last_changed_fraction = float(changed.mean())
+        if self.last_changed_fraction > self.full_fraction:
+            return self._full_match(imgL, imgR, gray)
+        try:
+            self._match_changed(imgL, imgR, gray, changed)
+        except cv2.error:
+            # Tiles may be half updated; start over with a full match
+            self.reset()
+            raise
+        self.frames_since_refresh += 1
+
+        # Callers keep the returned map (e.g. for captures) while the next
+        # frame updates the carried-over one in place
+        return self.disparity.copy()
+
+    def _match_changed(self, imgL, imgR, gray, changed):
+        height, width = gray.shape
+        # SGBM needs a crop wider than its search range plus one block
+        min_width = self.min_disp + self.num_disp + self.window_size
+        rows = np.linspace(0, height, self.tiles[1] + 1).astype(int)
+        cols = np.linspace(0, width, self.tiles[0] + 1).astype(int)
+        for r in range(self.tiles[1]):
+            c = 0
+            while c < self.tiles[0]:
+                if not changed[r, c]:
+                    c += 1
+                    continue
+                start = c
+                while c < self.tiles[0] and changed[r, c]:
+                    c += 1
+                top, bottom = rows[r], rows[r + 1]
+                left, right = cols[start], cols[c]
+
+                x0, y0, x1, y1 = matching_window((left, top, right - left, bottom - top), gray.shape,
+                                                 self.min_disp, self.num_disp, self.window_size,
+                                                 margin=self.window_size)
+                if x1 - x0 < min_width:
+                    # Clamped at a border: widen towards the other side
+                    x1 = min(width, x0 + min_width)
+                    x0 = max(0, x1 - min_width)
+                raw = self.stereo.compute(imgL[y0:y1, x0:x1], imgR[y0:y1, x0:x1])
+                region = self.disparity[top:bottom, left:right]
+                region[:] = raw[top - y0:bottom - y0, left - x0:right - x0]
+                region /= 16.0
+                self.reference[top:bottom, left:right] = gray[top:bottom, left:right]
+
+
+# Striped engines created for compute_stereo_depth_striped, most recently used last
+_striped_engines = OrderedDict()
+_striped_lock = threading.Lock()
+
+
+def compute_stereo_depth_striped(imgL, imgR, stereo, bands=None, overlap=None):
+    """Stand-in for compute_stereo_depth(imgL, imgR, stereo) using parallel bands
+
+    The engine for each matcher is kept for the next call; only the last
+    STRIPED_CACHE_SIZE matchers keep theirs, older engines are closed.
+    Not safe to call concurrently with the same `stereo` from several
+    threads; give each thread its own matcher, as the pipeline does.
+    """
+    # The entry holds `stereo`, so its id cannot be reused while cached
+    key = (id(stereo), bands, overlap)
+    with _striped_lock:
+        entry = _striped_engines.get(key)
+        if entry is None:
+            entry = (stereo, StripedSGBMEngine(bands=bands, overlap=overlap, matcher=stereo))
+            _striped_engines[key] = entry
+        _striped_engines.move_to_end(key)
+        while len(_striped_engines) > STRIPED_CACHE_SIZE:
+            _, (_, evicted) = _striped_engines.popitem(last=False)
+            evicted.close()
+    return entry[1].compute(imgL, imgR)
+
+
+DISPARITY_MODES = {
+    'full': SGBMEngine,
+    'roi': RoiSGBMEngine,
+    'striped': StripedSGBMEngine,
+    'temporal': TemporalSGBMEngine,
+}
+# Engines whose output depends on the previous frames they saw: split across
+# parallel workers each would see only some of the frames
+STATEFUL_MODES = ('temporal',)
+
+
+def disparity_workers(mode, workers):
+    """Pipeline workers for a disparity mode: stateful engines run on exactly one"""
+    return 1 if mode in STATEFUL_MODES else workers
+
+
+def create_disparity_engine(mode='full', **params):
+    """Create a disparity engine; every engine exposes compute(imgL, imgR) -> float32 disparity"""
+    if mode not in DISPARITY_MODES:
+        raise ValueError(f"Unknown disparity mode '{mode}', expected one of {sorted(DISPARITY_MODES)}")
+    return DISPARITY_MODES[mode](**params)
@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+
+# Newest decoded frame from each camera plus their capture timestamps
+StereoPair = namedtuple('StereoPair', ['left', 'right', 'ts_left', 'ts_right', 'seq'])
+
+
+def configure_capture(cap, width, height, fps):
+    """Apply the MJPEG capture settings used by all depth scripts"""
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    cap.set(cv2.CAP_PROP_FPS, fps)
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+
+class _CameraReader:
+    """Grab/decode loop for a single camera"""
+
+    def __init__(self, cap, name, on_frame):
+        self.cap = cap
+        self.name = name
+        self.on_frame = on_frame
+        self.running = False
+        self.thread = None
+        self.failures = 0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name=f'grab-{self.name}', daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=1.0):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def _run(self):
+        while self.running:
+            # grab() returns once the frame is off the USB bus, so stamp it there
+            if not self.cap.grab():
+                self.failures += 1
+                time.sleep(0.005)
+                continue
+            timestamp = time.monotonic()
+
+            # retrieve() does the MJPEG decode; a fresh array each time keeps
+            # frames already handed to the consumer untouched
+            ret, frame = self.cap.retrieve()
+            if not ret:
+                self.failures += 1
+                continue
+            self.on_frame(self.name, frame, timestamp)
+
+
+class StereoGrabber:
+    """Threaded stereo capture that always holds the newest decoded pair
+
+    Each camera is read on its own thread. Decoded frames land in a back
+    slot and are swapped to the front under a lock, so `latest_pair()` never
+    waits on USB transfers or MJPEG decoding.
+    """
+
+    def __init__(self, capL, capR):
+        self.capL = capL
+        self.capR = capR
+        self._cond = threading.Condition()
+        # front[name] = (frame, timestamp); the back slot is the frame each
+        # reader thread is currently decoding
+        self._front = {'left': None, 'right': None}
+        self._counts = {'left': 0, 'right': 0}
+        self._readers = [
+            _CameraReader(capL, 'left', self._publish),
+            _CameraReader(capR, 'right', self._publish),
+        ]
+
+    def _publish(self, name, frame, timestamp):
+        with self._cond:
+            self._counts[name] += 1
+            self._front[name] = (frame, timestamp)
+            self._cond.notify_all()
+
+    def _seq(self):
+        # A pair is only "new" once both cameras have delivered a frame
+        return min(self._counts['left'], self._counts['right'])
+
+    def start(self):
+        """Start both camera threads"""
+        for reader in self._readers:
+            reader.start()
+        return self
+
+    def stop(self):
+        """Stop the camera threads (cameras are not released)"""
+        for reader in self._readers:
+            reader.stop()
+
+    def release(self):
+        """Stop the threads and release both cameras"""
+        self.stop()
+        self.capL.release()
+        self.capR.release()
+
+    @property
+    def failures(self):
+        return sum(reader.failures for reader in self._readers)
+
+    def latest_pair(self, after_seq=None, timeout=1.0):
+        """Return the newest StereoPair, or None if none is available
+
+        With `after_seq` set, wait up to `timeout` seconds for a pair newer
+        than that sequence number instead of returning the same pair twice.
+        """
+        with self._cond:
+            if after_seq is not None:
+                self._cond.wait_for(lambda: self._seq() > after_seq, timeout)
+            front_l = self._front['left']
+            front_r = self._front['right']
+            if front_l is None or front_r is None:
+                return None
+            seq = self._seq()
+            if after_seq is not None and seq <= after_seq:
+                return None
+            return StereoPair(front_l[0], front_r[0], front_l[1], front_r[1], seq)
+
+    def wait_ready(self, timeout=5.0):
+        """Block until both cameras have delivered at least one frame"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._seq() > 0, timeout)
@@ -0,0 +1,205 @@
+import argparse
+import base64
+import json
+import subprocess
+import sys
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- CONFIGURATION ---
+CAPTURES = 5
+WIDTH = 640
+HEIGHT = 480
+BENCH_PRIVATE_KEY = '0x' + '11' * 32
+
+
+def read_body(handler):
+    """Request body for Content-Length or chunked requests, plus bytes read off the socket"""
+    if handler.headers.get('Transfer-Encoding', '').lower() != 'chunked':
+        body = handler.rfile.read(int(handler.headers.get('Content-Length', 0)))
+        return body, len(body)
+    chunks, wire = [], 0
+    while True:
+        size_line = handler.rfile.readline()
+        wire += len(size_line)
+        size = int(size_line.split(b';')[0], 16)
+        chunk = handler.rfile.read(size + 2)
+        wire += len(chunk)
+        if size == 0:
+            break
+        chunks.append(chunk[:-2])
+    return b''.join(chunks), wire
+
+
+def parse_binary_upload(content_type, body):
+    """Rebuild the JSON document from a multipart capture, as the file server does"""
+    message = BytesParser(policy=HTTP).parsebytes(
+        f'Content-Type: {content_type}\r\n\r\n'.encode('ascii') + body)
+    parts = {part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+             for part in message.iter_parts()}
+    meta = json.loads(parts['meta'])
+    return {
+        'data': {
+            'timestamp': meta['timestamp'],
+            'baseImage': base64.b64encode(parts['baseImage']).decode('ascii'),
+            'depthImage': base64.b64encode(parts['depthImage']).decode('ascii'),
+            'depthData': json.loads(parts['depthData']),
+        },
+        'manifest': meta['manifest'],
+        'signature': meta['signature'],
+    }
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Local stand-in for the file server that records what arrives on the wire"""
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.requests = []
+        self.verify_failures = 0
+
+    def verify(self):
+        """Check the recorded uploads against their manifests (after timing, so parsing is not billed)"""
+        from manifest import verify_components
+
+        for request in self.requests:
+            if request['path'].endswith('/binary'):
+                document = parse_binary_upload(request['content_type'], request['body'])
+            else:
+                document = json.loads(request['body'])
+            if verify_components(document['data'], document['manifest']):
+                self.verify_failures += 1
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        header_bytes = sum(len(k) + len(v) + 4 for k, v in self.headers.items())
+        body, wire = read_body(self)
+        self.server.requests.append({'path': self.path, 'client': self.client_address,
+                                     'content_type': self.headers['Content-Type'],
+                                     'body': body, 'wire_bytes': wire + header_bytes})
+
+        response = json.dumps({'status': 'success', 'data': {'pieceCid': 'stand-in'}}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+
+
+def memory_kib(field):
+    """VmRSS / VmHWM of this process in KiB (Linux)"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def reset_peak_rss():
+    """Reset VmHWM so the peak covers only what runs next (Linux >= 4.0)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def run_client(mode, server_url, captures, width, height, replay):
+    """Upload `captures` payloads in one mode and print the client-side numbers as JSON"""
+    import benchmark
+    import depthmap
+    from device_signer import DeviceSigner
+    from uploader import UploadClient
+
+    inputs = benchmark.load_inputs(width, height, replay)
+    signer = DeviceSigner(BENCH_PRIVATE_KEY)
+    binary = mode == 'binary'
+    uploader = UploadClient(server_url)
+
+    # Warm-up builds and uploads one payload so imports and pools are settled
+    payload = depthmap.create_signed_payload(inputs['imgL'], inputs['other_views'], inputs['disparity'], 0,
+                                             signer, binary=binary)
+    depthmap.upload_to_server(payload, uploader, mode)
+    del payload
+
+    baseline = memory_kib('VmRSS')
+    reset_peak_rss()
+    start = time.perf_counter()
+    for n in range(captures):
+        payload = depthmap.create_signed_payload(inputs['imgL'], inputs['other_views'], inputs['disparity'], n + 1,
+                                                 signer, binary=binary)
+        success, _, _ = depthmap.upload_to_server(payload, uploader, mode)
+        del payload
+        if not success:
+            raise RuntimeError(f"{mode} upload failed")
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        'mode': mode,
+        'mean_ms': elapsed / captures * 1000,
+        'baseline_rss_kib': baseline,
+        'peak_rss_kib': memory_kib('VmHWM'),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes on the wire and peak RSS of JSON vs streamed binary uploads")
+    parser.add_argument('--captures', type=int, default=CAPTURES)
+    parser.add_argument('--resolution', default=f'{WIDTH}x{HEIGHT}', metavar='WxH')
+    parser.add_argument('--replay', metavar='PATH', help="Use the first recorded stereo pair instead of synthetic frames")
+    parser.add_argument('--client', choices=('json', 'binary'), help=argparse.SUPPRESS)
+    parser.add_argument('--server-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.resolution.lower().split('x'))
+
+    if args.client:
+        run_client(args.client, args.server_url, args.captures, width, height, args.replay)
+        return
+
+    server = StandInServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print("="*70)
+    print(f"UPLOAD BENCHMARK - {args.captures} captures at {width}x{height}, stand-in server {server.url}")
+    print("="*70)
+    for mode in ('json', 'binary'):
+        # Each mode runs in its own process so the RSS numbers do not mix
+        command = [sys.executable, __file__, '--client', mode, '--server-url', server.url,
+                   '--captures', str(args.captures), '--resolution', args.resolution]
+        if args.replay:
+            command += ['--replay', args.replay]
+        server.requests.clear()
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        client = json.loads(output.strip().splitlines()[-1])
+        measured = server.requests[1:]  # skip the warm-up upload
+        wire = sum(r['wire_bytes'] for r in measured) / len(measured)
+        connections = len({r['client'] for r in server.requests})
+        print(f"  {mode:<7} wire {wire / 1024:8.1f} KiB/capture   {client['mean_ms']:7.1f} ms/capture   "
+              f"{connections} connection(s)   "
+              f"peak RSS +{(client['peak_rss_kib'] - client['baseline_rss_kib']) / 1024:6.1f} MiB "
+              f"(peak {client['peak_rss_kib'] / 1024:.1f} MiB)")
+        server.verify()
+    if server.verify_failures:
+        print(f"❌ {server.verify_failures} uploads did not match their manifest digests")
+    else:
+        print("✓ Every upload matched its manifest digests")
+    print("="*70)
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+import base64
+import json
+import random
+import threading
+import time
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+# --- CONFIGURATION ---
+JSON_UPLOAD_PATH = '/api/upload'
+BINARY_UPLOAD_PATH = '/api/upload/binary'
+UPLOAD_TIMEOUT = 150
+# (connect, read) seconds for UploadClient: fail fast on a dead server, wait on a slow Filecoin upload
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 150
+UPLOAD_RETRIES = 3
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+# Only statuses where the request never reached the app: a 500 may come after the
+# capture was already stored, and re-sending it would store it twice
+RETRY_STATUSES = (502, 503, 504)
+# 4xx statuses that can pass later; any other 4xx means the server refused the capture itself
+RETRY_LATER_STATUSES = (408, 429)
+POOL_SIZE = 4
+# Size of the body chunks handed to the socket when streaming
+STREAM_CHUNK = 1 << 16
+# 'binary' streams raw JPEG bytes as multipart parts, 'json' posts the base64 JSON payload
+UPLOAD_MODES = ('binary', 'json')
+
+
+def parse_piece_cid(result):
+    """PieceCID from the server response, which may be a string or an IPLD {'/': cid} link"""
+    piece_cid_raw = result.get('data', {}).get('pieceCid', 'N/A')
+    if piece_cid_raw and isinstance(piece_cid_raw, dict) and '/' in piece_cid_raw:
+        return piece_cid_raw['/']
+    if piece_cid_raw:
+        return str(piece_cid_raw)
+    return 'N/A'
+
+
+def multipart_part(name, body, content_type, filename=None):
+    """One multipart/form-data part; `body` is any bytes-like object and is not copied"""
+    return {'name': name, 'body': memoryview(body).cast('B'), 'content_type': content_type,
+            'filename': filename}
+
+
+def iter_multipart(parts, boundary, chunk_size=STREAM_CHUNK):
+    """Yield a multipart/form-data body piece by piece
+
+    Part bodies are sliced from memoryviews, so the body is never joined
+    into one buffer; requests sends a generator body with chunked
+    transfer encoding.
+    """
+    for part in parts:
+        disposition = f'form-data; name="{part["name"]}"'
+        if part['filename']:
+            disposition += f'; filename="{part["filename"]}"'
+        yield (f'--{boundary}\r\n'
+               f'Content-Disposition: {disposition}\r\n'
+               f'Content-Type: {part["content_type"]}\r\n\r\n').encode('ascii')
+        body = part['body']
+        for offset in range(0, len(body), chunk_size):
+            yield body[offset:offset + chunk_size]
+        yield b'\r\n'
+    yield f'--{boundary}--\r\n'.encode('ascii')
+
+
+def capture_parts(payload):
+    """Multipart parts for a binary capture payload
+
+    `payload['data']` holds the raw JPEG buffers (baseImage, depthImage) and
+    the encoded depthData; the small `meta` part carries the timestamp,
+    manifest and signature. The server base64-encodes the images again, so
+    the stored JSON is identical to a JSON-mode upload and the manifest
+    digests still verify.
+    """
+    data = payload['data']
+    timestamp = data['timestamp']
+    meta = {
+        'timestamp': timestamp,
+        'manifest': payload.get('manifest'),
+        'signature': payload.get('signature', ''),
+    }
+    return [
+        multipart_part('meta', json.dumps(meta).encode('utf-8'), 'application/json'),
+        multipart_part('depthData', json.dumps(data['depthData']).encode('utf-8'), 'application/json'),
+        multipart_part('baseImage', data['baseImage'], 'image/jpeg', f'capture_{timestamp}_left.jpg'),
+        multipart_part('depthImage', data['depthImage'], 'image/jpeg', f'capture_{timestamp}_views.jpg'),
+    ]
+
+
+def _counted(chunks, counter):
+    for chunk in chunks:
+        counter[0] += len(chunk)
+        yield chunk
+
+
+def post_binary(payload, server_url, timeout=UPLOAD_TIMEOUT, session=requests, sent=None):
+    """Stream a binary capture payload as multipart/form-data and return the response
+
+    `sent` is an optional one-item list that accumulates the body bytes sent.
+    """
+    boundary = uuid.uuid4().hex
+    body = iter_multipart(capture_parts(payload), boundary)
+    return session.post(
+        f"{server_url}{BINARY_UPLOAD_PATH}",
+        data=_counted(body, sent) if sent is not None else body,
+        headers={'Content-Type': f'multipart/form-data; boundary={boundary}'},
+        timeout=timeout,
+    )
+
+
+def json_payload(payload):
+    """Payload with any raw JPEG buffers replaced by their base64 text"""
+    data = dict(payload['data'])
+    for name in ('baseImage', 'depthImage'):
+        if not isinstance(data[name], str):
+            data[name] = base64.b64encode(data[name]).decode('ascii')
+    return {**payload, 'data': data}
+
+
+def post_json(payload, server_url, timeout=UPLOAD_TIMEOUT, session=requests, sent=None):
+    """POST the base64 JSON payload (the original upload format)"""
+    body = json.dumps(json_payload(payload)).encode('utf-8')
+    if sent is not None:
+        sent[0] += len(body)
+    return session.post(
+        f"{server_url}{JSON_UPLOAD_PATH}",
+        data=body,
+        headers={'Content-Type': 'application/json'},
+        timeout=timeout,
+    )
+
+
+def rejected(status_code):
+    """Whether the server refused the capture itself, so sending it again cannot help"""
+    return 400 <= status_code < 500 and status_code not in RETRY_LATER_STATUSES
+
+
+def never_sent(error):
+    """Whether a failed request certainly did not reach the server, so re-sending is safe"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], 'reason', None), NewConnectionError)
+    return False
+
+
+class UploadClient:
+    """Long-lived uploader: one keep-alive session, retries with backoff, counters
+
+    The session's connection pool keeps the TCP (and TLS) connection to the
+    server open between captures. Failures where the request certainly never
+    reached the server (connection refused, connect timeout, 502/503/504)
+    are retried up to `retries` times with exponential backoff (with jitter,
+    capped at `backoff_max`); the request body is rebuilt for every attempt,
+    so streamed binary uploads retry too. A read timeout, a dropped
+    connection or any other response is not retried, since the server may
+    already have stored the capture. Counters are available from `stats()`.
+    """
+
+    def __init__(self, server_url, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 retries=UPLOAD_RETRIES, backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX,
+                 pool_size=POOL_SIZE):
+        self.server_url = server_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # Retries are handled here, not by urllib3, which cannot replay a streamed body
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self.counters = {
+            'uploads': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'attempts': 0,
+            'retries': 0,
+            'bytes_sent': 0,
+            'latency_s': 0.0,
+        }
+
+    def _count(self, **changes):
+        with self._lock:
+            for key, value in changes.items():
+                self.counters[key] += value
+
+    def backoff(self, attempt):
+        """Delay before retry number `attempt` (1-based)"""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def upload(self, payload, mode='binary'):
+        """Send one capture; returns the final response, or raises the last connection error"""
+        post = post_binary if mode == 'binary' else post_json
+        self._count(uploads=1)
+        attempt = 0
+        while True:
+            attempt += 1
+            sent = [0]
+            start = time.perf_counter()
+            error = None
+            try:
+                response = post(payload, self.server_url, timeout=self.timeout, session=self.session, sent=sent)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                response, error = None, e
+            self._count(attempts=1, bytes_sent=sent[0], latency_s=time.perf_counter() - start)
+
+            if error is not None:
+                retryable = never_sent(error)
+            else:
+                retryable = response.status_code in RETRY_STATUSES
+            if not retryable or attempt > self.retries:
+                ok = response is not None and response.status_code == 200
+                self._count(succeeded=int(ok), failed=int(not ok))
+                if error is not None:
+                    raise error
+                return response
+
+            delay = self.backoff(attempt)
+            reason = error if error is not None else f"status {response.status_code}"
+            print(f"⚠ Upload attempt {attempt} failed ({reason}), retrying in {delay:.1f}s...")
+            self._count(retries=1)
+            time.sleep(delay)
+
+    def stats(self):
+        """Copy of the counters plus the mean latency per attempt"""
+        with self._lock:
+            stats = dict(self.counters)
+        stats['mean_attempt_ms'] = stats['latency_s'] / stats['attempts'] * 1000 if stats['attempts'] else 0.0
+        return stats
+
+    def print_summary(self):
+        stats = self.stats()
+        print(f"✓ Uploads: {stats['succeeded']}/{stats['uploads']} succeeded, {stats['attempts']} attempts "
+              f"({stats['retries']} retries), {stats['bytes_sent'] / 1024:.1f} KiB sent, "
+              f"{stats['mean_attempt_ms']:.0f} ms per attempt")
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,187 @@
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from eth_account import Account
+from eth_account.messages import encode_defunct
+
+from capture_reader import CaptureReader
+from depth_codec import decode_depth_data
+from manifest import canonical_json, recover_manifest_signer
+
+# --- CONFIGURATION ---
+PATTERN = 'depth_capture_*.json'
+# Files handed to a worker process at a time
+CHUNK_SIZE = 8
+# SGBM search range used by the device (NUM_DISP), plus a margin
+MAX_DISPARITY = 256
+# Reported stats may differ from the decoded map by the fixed-point step
+STAT_TOLERANCE = 1 / 16
+OUTPUT_FILE = 'verify_summary.json'
+# EIP-191 signatures are r, s and v: 65 bytes, 130 hex digits with or without 0x
+SIGNATURE_BYTES = 65
+
+
+def check_signature(signature):
+    """Raise ValueError unless `signature` is SIGNATURE_BYTES of hex text"""
+    digits = signature[2:] if signature.startswith('0x') else signature
+    try:
+        raw = bytes.fromhex(digits)
+    except ValueError:
+        raw = None
+    if raw is None or len(raw) != SIGNATURE_BYTES:
+        raise ValueError(f"signature is not {SIGNATURE_BYTES} bytes of hex ({len(signature)} characters)")
+
+
+def recover_signer(reader):
+    """(signer address, scheme) from a capture's signature"""
+    signature = reader.signature
+    if not isinstance(signature, str):
+        raise ValueError(f"signature is a JSON {type(signature).__name__}, not a string")
+    if not signature or signature.startswith(('UNSIGNED', 'SIGNATURE_ERROR')):
+        return None, 'unsigned'
+    check_signature(signature)
+    manifest = reader.manifest
+    if manifest is not None:
+        if not isinstance(manifest, dict):
+            raise ValueError(f"manifest is a JSON {type(manifest).__name__}, not an object")
+        return recover_manifest_signer(manifest, signature), 'manifest'
+    # Captures from before the manifest were signed over the full data JSON,
+    # so only these are loaded whole
+    message = encode_defunct(text=canonical_json(reader.data()))
+    return Account.recover_message(message, signature=signature), 'full-payload'
+
+
+def check_depth(depth_data, disparity, base_image, errors):
+    """Sanity checks of the decoded depth map against its reported stats"""
+    if base_image is not None and disparity.shape != base_image.shape[:2]:
+        errors.append(f"depth shape {disparity.shape} does not match base image {base_image.shape[:2]}")
+    if not np.isfinite(disparity).all():
+        errors.append("depth map contains NaN or inf")
+        return
+    valid = disparity > 0
+    valid_pixels = int(np.count_nonzero(valid))
+    if valid_pixels != depth_data.get('valid_pixels'):
+        errors.append(f"valid_pixels is {depth_data.get('valid_pixels')}, decoded map has {valid_pixels}")
+    if valid_pixels == 0:
+        return
+    decoded_max = float(disparity[valid].max())
+    if decoded_max > MAX_DISPARITY:
+        errors.append(f"disparity {decoded_max:.2f} outside 0..{MAX_DISPARITY}")
+    if abs(decoded_max - depth_data.get('max', decoded_max)) > STAT_TOLERANCE:
+        errors.append(f"max is {depth_data.get('max')}, decoded map has {decoded_max:.4f}")
+
+
+def verify_capture(path, allowed=None):
+    """Verify one capture file; returns a JSON-ready result dict"""
+    result = {'file': os.path.basename(path), 'ok': False, 'signer': None, 'scheme': None, 'errors': []}
+    errors = result['errors']
+    try:
+        with CaptureReader(path) as reader:
+            result['timestamp'] = reader.timestamp
+            signer, scheme = recover_signer(reader)
+            result['signer'], result['scheme'] = signer, scheme
+            if signer is None:
+                errors.append("capture is not signed")
+            elif allowed and signer.lower() not in allowed:
+                errors.append(f"signer {signer} is not in the allow-list")
+            if scheme == 'manifest':
+                mismatched = reader.verify_components()
+                if mismatched:
+                    errors.append(f"manifest digest mismatch: {', '.join(mismatched)}")
+
+            base_image = reader.image('baseImage')
+            if base_image is None:
+                errors.append("baseImage is not a decodable JPEG")
+            if reader.image('depthImage') is None:
+                errors.append("depthImage is not a decodable JPEG")
+
+            depth_data = reader.depth_data()
+            check_depth(depth_data, decode_depth_data(depth_data), base_image, errors)
+    except Exception as e:
+        # A malformed capture is a failed result, never the end of the batch
+        errors.append(f"{type(e).__name__}: {e}")
+    result['ok'] = not errors
+    return result
+
+
+def _verify_chunk(args):
+    paths, allowed = args
+    return [verify_capture(path, allowed) for path in paths]
+
+
+def verify_directory(directory, allowed=None, workers=None, pattern=PATTERN, chunk_size=CHUNK_SIZE):
+    """Verify every capture in `directory` across a process pool; returns the per-file results"""
+    paths = sorted(glob.glob(os.path.join(directory, pattern)))
+    chunks = [(paths[i:i + chunk_size], allowed) for i in range(0, len(paths), chunk_size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk_results in pool.map(_verify_chunk, chunks):
+            for result in chunk_results:
+                status = '✓' if result['ok'] else '❌'
+                detail = result['signer'] or 'unsigned'
+                if not result['ok']:
+                    detail += ' - ' + '; '.join(result['errors'])
+                print(f"{status} {result['file']}: {detail}")
+            results.extend(chunk_results)
+    return results
+
+
+def summarize(results, elapsed):
+    signers = {}
+    for result in results:
+        key = result['signer'] or 'unsigned'
+        signers[key] = signers.get(key, 0) + 1
+    return {
+        'files': len(results),
+        'passed': sum(r['ok'] for r in results),
+        'failed': sum(not r['ok'] for r in results),
+        'signers': signers,
+        'elapsed_s': elapsed,
+        'failures': [r for r in results if not r['ok']],
+    }
+
+
+def load_allow_list(addresses, allow_file):
+    allowed = {a.lower() for a in addresses or []}
+    if allow_file:
+        with open(allow_file) as f:
+            allowed |= {line.strip().lower() for line in f if line.strip() and not line.startswith('#')}
+    return allowed or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify signed depth_capture_*.json files in bulk")
+    parser.add_argument('directory', help="Directory of capture files")
+    parser.add_argument('--allow', action='append', metavar='ADDRESS', help="Allowed signer address (repeatable)")
+    parser.add_argument('--allow-file', metavar='PATH', help="File with one allowed signer address per line")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--pattern', default=PATTERN, help="Capture file glob (default: %(default)s)")
+    parser.add_argument('--output', default=OUTPUT_FILE, help="Where to write the JSON summary")
+    args = parser.parse_args()
+
+    allowed = load_allow_list(args.allow, args.allow_file)
+    start = time.perf_counter()
+    results = verify_directory(args.directory, allowed, args.workers, args.pattern)
+    summary = summarize(results, time.perf_counter() - start)
+
+    with open(args.output, 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    print("\n" + "="*70)
+    print(f"VERIFIED {summary['files']} captures in {summary['elapsed_s']:.1f}s: "
+          f"{summary['passed']} passed, {summary['failed']} failed")
+    for signer, count in sorted(summary['signers'].items()):
+        print(f"  {signer}: {count}")
+    print(f"Summary:  {args.output}")
+    print("="*70)
+    if summary['failed']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
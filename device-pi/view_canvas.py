@@ -0,0 +1,97 @@
+import cv2
+import numpy as np
+
+# --- CONFIGURATION ---
+LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+LABEL_ORIGIN = (10, 30)
+LABEL_SCALE = 0.7
+LABEL_THICKNESS = 2
+
+
+def render_label(text, color, scale=LABEL_SCALE, thickness=LABEL_THICKNESS, origin=LABEL_ORIGIN):
+    """(pixels, mask) of a label rasterised once, for stamping onto a tile every frame"""
+    (text_w, text_h), baseline = cv2.getTextSize(text, LABEL_FONT, scale, thickness)
+    patch = np.zeros((origin[1] + baseline + thickness, origin[0] + text_w + thickness, 3), dtype=np.uint8)
+    cv2.putText(patch, text, origin, LABEL_FONT, scale, color, thickness)
+    return patch, patch.any(axis=2, keepdims=True)
+
+
+class FiveViewCanvas:
+    """The 5-view display as one persistent canvas with a view per tile
+
+    Layout: three tiles on top (left | right | depth map) and two centred
+    tiles below, with black margins either side. `set_view(i, image)`
+    copies a frame straight into its tile and stamps the tile's label,
+    which is rasterised once in the constructor; per-frame text (FPS,
+    blend) goes through `put_text` and overlays onto `image`. This
+    replaces the per-frame .copy() of every view, the hconcat/vconcat of
+    the rows and the freshly allocated padding.
+
+    Tiles are overwritten every frame and carry the status overlay once it
+    is drawn, so captures take a fresh composite from `other_views`.
+
+    For a scaled-down canvas pass `text_scale`: label and `put_text`
+    positions, sizes and thickness are given at full size and scaled.
+    """
+
+    def __init__(self, width, height, labels, text_scale=1.0):
+        self.width = width
+        self.height = height
+        self.text_scale = text_scale
+        self.image = np.zeros((2 * height, 3 * width, 3), dtype=np.uint8)
+        origins = [(0, 0), (width, 0), (2 * width, 0), (width // 2, height), (width // 2 + width, height)]
+        self.tiles = [self.image[y:y + height, x:x + width] for x, y in origins]
+        self.margins = [self.image[height:, :width // 2], self.image[height:, width // 2 + 2 * width:]]
+        # Each label is (text, color) or (text, color, scale)
+        self.labels = [self._render_label(*label) for label in labels]
+        # Frame and dynamic text of every tile, to rebuild a capture without the overlays
+        self.sources = [None] * len(self.tiles)
+        self.texts = [[] for _ in self.tiles]
+
+    def _scaled(self, origin, scale, thickness):
+        ts = self.text_scale
+        return (round(origin[0] * ts), round(origin[1] * ts)), scale * ts, max(1, round(thickness * ts))
+
+    def _render_label(self, text, color, scale=LABEL_SCALE):
+        origin, scale, thickness = self._scaled(LABEL_ORIGIN, scale, LABEL_THICKNESS)
+        return render_label(text, color, scale, thickness, origin)
+
+    def _render(self, index, tile):
+        image = self.sources[index]
+        if image.shape[:2] != tile.shape[:2]:
+            cv2.resize(image, (self.width, self.height), dst=tile)
+        else:
+            np.copyto(tile, image)
+        pixels, mask = self.labels[index]
+        h, w = pixels.shape[:2]
+        np.copyto(tile[:h, :w], pixels, where=mask)
+        for text in self.texts[index]:
+            cv2.putText(tile, *text)
+
+    def set_view(self, index, image):
+        self.sources[index] = image
+        self.texts[index] = []
+        self._render(index, self.tiles[index])
+
+    def put_text(self, index, text, origin, scale, color, thickness=LABEL_THICKNESS):
+        origin, scale, thickness = self._scaled(origin, scale, thickness)
+        args = (text, origin, LABEL_FONT, scale, color, thickness)
+        self.texts[index].append(args)
+        cv2.putText(self.tiles[index], *args)
+
+    def clear_margins(self):
+        """Blank the margins beside the bottom row (overlays drawn over the whole canvas can reach them)"""
+        for margin in self.margins:
+            margin.fill(0)
+
+    def other_views(self):
+        """New 2x2 composite of every view but the left camera, without the status overlays
+
+        Rendered again from the current frame's views, so it is safe to keep
+        after the canvas moves on to the next frame.
+        """
+        h, w = self.height, self.width
+        composite = np.empty((2 * h, 2 * w, 3), dtype=np.uint8)
+        for index, (x, y) in zip(range(1, 5), [(0, 0), (w, 0), (0, h), (w, h)]):
+            self._render(index, composite[y:y + h, x:x + w])
+        return composite
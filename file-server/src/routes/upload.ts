@@ -1,9 +1,82 @@
 import { Router, Request, Response } from 'express';
+import multer from 'multer';
 import { uploadToStorage, downloadFromStorage } from '../services/synapse.js';
 import { savePostHash } from '../services/mongodb.js';
 
 const router = Router();
 
+const binaryUpload = multer({
+  storage: multer.memoryStorage(),
+  limits: { fileSize: 20 * 1024 * 1024 },
+}).fields([
+  { name: 'meta', maxCount: 1 },
+  { name: 'depthData', maxCount: 1 },
+  { name: 'baseImage', maxCount: 1 },
+  { name: 'depthImage', maxCount: 1 },
+]);
+
+/**
+ * Store a witness JSON document on Filecoin and index it in MongoDB
+ */
+async function storeWitness(jsonContent: Record<string, any>, res: Response) {
+  // Extract signature from JSON (if present)
+  const signature = jsonContent.signature || '';
+
+  // Prepare metadata object from the JSON content
+  // Include all top-level fields from the JSON as metadata
+  const metadata: Record<string, any> = {
+    uploadedAt: new Date().toISOString(),
+  };
+
+  // Add signature to metadata if present
+  if (signature) {
+    metadata.signature = signature;
+  }
+
+  // Include other metadata fields from the JSON (excluding signature which is already added)
+  // Store the full JSON structure for reference
+  if (jsonContent.data) {
+    metadata.data = jsonContent.data;
+  }
+
+  // Add any other top-level fields from the JSON
+  Object.keys(jsonContent).forEach(key => {
+    if (key !== 'signature' && key !== 'data') {
+      metadata[key] = jsonContent[key];
+    }
+  });
+
+  // Convert JSON to string and then to Uint8Array for storage
+  const jsonString = JSON.stringify(jsonContent);
+  const fileData = new Uint8Array(Buffer.from(jsonString, 'utf-8'));
+
+  // Upload to Filecoin storage
+  const result = await uploadToStorage(fileData, metadata);
+
+  console.log('result:', JSON.stringify(result, null, 2));
+
+  // Save hash to MongoDB after successful upload
+  try {
+    await savePostHash(result.pieceCid, {
+      size: result.size,
+      ...metadata,
+    });
+  } catch (mongoError: any) {
+    // Log MongoDB error but don't fail the upload response
+    // The file was successfully uploaded to Filecoin
+    console.error('Failed to save hash to MongoDB:', mongoError);
+  }
+
+  res.status(200).json({
+    status: 'success',
+    data: {
+      pieceCid: result.pieceCid,
+      size: result.size,
+      metadata,
+    },
+  });
+}
+
 /**
  * POST /api/upload
  * Upload JSON metadata
@@ -23,64 +96,57 @@ router.post('/', async (req: Request, res: Response) => {
       });
     }
 
-    // Extract signature from JSON (if present)
-    const signature = jsonContent.signature || '';
-
-    // Prepare metadata object from the JSON content
-    // Include all top-level fields from the JSON as metadata
-    const metadata: Record<string, any> = {
-      uploadedAt: new Date().toISOString(),
-    };
-
-    // Add signature to metadata if present
-    if (signature) {
-      metadata.signature = signature;
-    }
-
-    // Include other metadata fields from the JSON (excluding signature which is already added)
-    // Store the full JSON structure for reference
-    if (jsonContent.data) {
-      metadata.data = jsonContent.data;
-    }
-
-    // Add any other top-level fields from the JSON
-    Object.keys(jsonContent).forEach(key => {
-      if (key !== 'signature' && key !== 'data') {
-        metadata[key] = jsonContent[key];
-      }
+    await storeWitness(jsonContent, res);
+  } catch (error: any) {
+    console.error('Upload error:', error);
+    res.status(500).json({
+      status: 'error',
+      message: error.message || 'Failed to upload file',
     });
+  }
+});
 
-    // Convert JSON to string and then to Uint8Array for storage
-    const jsonString = JSON.stringify(jsonContent);
-    const fileData = new Uint8Array(Buffer.from(jsonString, 'utf-8'));
-
-    // Upload to Filecoin storage
-    const result = await uploadToStorage(fileData, metadata);
-
-    console.log('result:', JSON.stringify(result, null, 2));
+/**
+ * POST /api/upload/binary
+ * Upload a capture as raw parts instead of base64 JSON
+ *
+ * Body (multipart/form-data, may be chunked):
+ * - meta: JSON with timestamp, manifest and signature
+ * - depthData: encoded depth data JSON
+ * - baseImage, depthImage: raw JPEG bytes
+ *
+ * The images are base64-encoded here, so the stored document is the same
+ * as a JSON upload and the signed manifest digests still verify.
+ */
+router.post('/binary', binaryUpload, async (req: Request, res: Response) => {
+  try {
+    const files = req.files as Record<string, Express.Multer.File[]> | undefined;
+    const part = (name: string) => files?.[name]?.[0]?.buffer;
+    const [meta, depthData, baseImage, depthImage] =
+      ['meta', 'depthData', 'baseImage', 'depthImage'].map(part);
 
-    // Save hash to MongoDB after successful upload
-    try {
-      await savePostHash(result.pieceCid, {
-        size: result.size,
-        ...metadata,
+    if (!meta || !depthData || !baseImage || !depthImage) {
+      return res.status(400).json({
+        status: 'error',
+        message: 'Binary upload requires meta, depthData, baseImage and depthImage parts',
       });
-    } catch (mongoError: any) {
-      // Log MongoDB error but don't fail the upload response
-      // The file was successfully uploaded to Filecoin
-      console.error('Failed to save hash to MongoDB:', mongoError);
     }
 
-    res.status(200).json({
-      status: 'success',
+    const { timestamp, manifest, signature } = JSON.parse(meta.toString('utf-8'));
+    const jsonContent: Record<string, any> = {
       data: {
-        pieceCid: result.pieceCid,
-        size: result.size,
-        metadata,
+        timestamp,
+        baseImage: baseImage.toString('base64'),
+        depthImage: depthImage.toString('base64'),
+        depthData: JSON.parse(depthData.toString('utf-8')),
       },
-    });
+      ...(manifest ? { manifest } : {}),
+      signature: signature || '',
+    };
+
+    await storeWitness(jsonContent, res);
   } catch (error: any) {
-    console.error('Upload error:', error);
+    console.error('Binary upload error:', error);
     res.status(500).json({
       status: 'error',
       message: error.message || 'Failed to upload file',
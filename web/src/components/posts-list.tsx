@@ -14,7 +14,7 @@ import {
 } from "@/components/ui/dialog";
 import { Database, Clock, FileText, Download, Loader2, Image as ImageIcon, Info, Hash, Layers, Activity, Maximize2, Minimize2, ChevronDown, ChevronUp, CheckCircle2, Copy } from "lucide-react";
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, PieChart, Pie, Cell, AreaChart, Area } from "recharts";
-import { verifySignature, addMetadataToPng } from "@/lib/utils";
+import { verifySignature, addMetadataToPng, type WitnessManifest } from "@/lib/utils";
 import { getNames } from "@/lib/namestone";
 import { toast } from "sonner";
 
@@ -45,6 +45,7 @@ interface ContentData {
     depthImage?: string;
     depthData?: DepthData;
   };
+  manifest?: WitnessManifest;
   signature?: string;
 }
 
@@ -141,14 +142,14 @@ function PostCard({ post }: { post: Post }) {
   const recoveredAddress = useMemo(() => {
     if (contentData?.data && contentData?.signature) {
       try {
-        return verifySignature(contentData.data, contentData.signature);
+        return verifySignature(contentData.data, contentData.signature, contentData.manifest);
       } catch (err) {
         console.error('Signature verification failed:', err);
         return null;
       }
     }
     return null;
-  }, [contentData?.data, contentData?.signature]);
+  }, [contentData?.data, contentData?.signature, contentData?.manifest]);
 
   useEffect(() => {
     const fetchContent = async () => {
@@ -449,14 +450,14 @@ function ContentDisplay({ data }: { data: ContentData }) {
   const recoveredAddress = useMemo(() => {
     if (data.data && data.signature) {
       try {
-        return verifySignature(data.data, data.signature);
+        return verifySignature(data.data, data.signature, data.manifest);
       } catch (err) {
         console.error('Signature verification failed:', err);
         return null;
       }
     }
     return null;
-  }, [data.data, data.signature]);
+  }, [data.data, data.signature, data.manifest]);
 
   useEffect(() => {
     const fetchSubname = async () => {
@@ -1,12 +1,12 @@
 import { clsx, type ClassValue } from "clsx"
 import { twMerge } from "tailwind-merge"
-import { verifyMessage } from "ethers"
+import { keccak256, toUtf8Bytes, verifyMessage } from "ethers"
 
 export function cn(...inputs: ClassValue[]) {
   return twMerge(clsx(inputs))
 }
 
-export function pythonifyWitnessData(data: any): string {
+export function pythonifyWitnessData(data: any, rootPath: string = ''): string {
   const floatPaths = new Set([
     'depthData.min',
     'depthData.max',
@@ -64,13 +64,42 @@ export function pythonifyWitnessData(data: any): string {
     return JSON.stringify(obj);
   }
 
-  return stringify(data);
+  return stringify(data, rootPath);
 }
 
-export function verifySignature(data: unknown, signature: string): string | null {
+export interface WitnessManifest {
+  scheme: string;
+  version: number;
+  digests: Record<string, string>;
+}
+
+// keccak256 of one capture component, matching device-pi/manifest.py:
+// strings (base64 images) are hashed as-is, everything else as Python-style JSON
+export function componentDigest(value: unknown, path: string): string {
+  const text = typeof value === 'string' ? value : pythonifyWitnessData(value, path);
+  return keccak256(toUtf8Bytes(text));
+}
+
+// Names of the components whose digest does not match the manifest
+export function verifyManifestComponents(data: Record<string, unknown>, manifest: WitnessManifest): string[] {
+  return Object.keys(manifest.digests).filter(
+    (name) => !(name in data) || manifest.digests[name] !== componentDigest(data[name], name)
+  );
+}
+
+export function verifySignature(data: unknown, signature: string, manifest?: WitnessManifest): string | null {
   try {
+    if (manifest) {
+      // Newer captures sign a manifest of per-component digests
+      const mismatched = verifyManifestComponents(data as Record<string, unknown>, manifest);
+      if (mismatched.length > 0) {
+        console.error("Manifest digest mismatch:", mismatched);
+        return null;
+      }
+    }
+
     // Use the Python-compatible stringifier
-    const message = pythonifyWitnessData(data);
+    const message = pythonifyWitnessData(manifest ?? data);
 
     // Ensure signature has 0x prefix
     const formattedSignature = signature.startsWith('0x') ? signature : `0x${signature}`;